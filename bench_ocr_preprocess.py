@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""OCR wall time and field accuracy for each preprocessing preset.
+
+    python bench_ocr_preprocess.py fixtures/ocr --engine tesseract easyocr
+    python bench_ocr_preprocess.py fixtures/ocr/oricon     # one source's screenshots
+
+A fixture is an image plus a JSON file with the same stem holding the
+expected books: a list of {"rank", "title", "author", "publisher"}, or a
+chart in the nippan_books.json shape. The committed fixtures are rendered
+by make_ocr_fixtures.py, one subdirectory per source.
+"""
+import argparse
+import difflib
+import json
+import os
+import time
+import unicodedata
+
+from ocr_engines import get_engine
+from ocr_preprocess import PRESETS, preprocess
+from scrape_from_image import IMAGE_EXTENSIONS
+
+FIELDS = ("title", "author", "publisher")
+
+# A field counts as read when some OCR line matches it this closely
+MATCH_RATIO = 0.85
+
+def load_fixtures(directory):
+    """(image path, expected books) for every fixture under directory, subdirectories included"""
+    fixtures = []
+    for root, dirs, names in os.walk(directory):
+        dirs.sort()
+        for name in sorted(names):
+            stem, ext = os.path.splitext(name)
+            expected_path = os.path.join(root, stem + '.json')
+            if ext.lower() not in IMAGE_EXTENSIONS or not os.path.exists(expected_path):
+                continue
+            with open(expected_path, 'r', encoding='utf-8') as f:
+                expected = json.load(f)
+            if isinstance(expected, dict):
+                expected = [book for books in expected.get("genres", {}).values() for book in books]
+            fixtures.append((os.path.join(root, name), expected))
+    return fixtures
+
+def normalize(text):
+    return ''.join(unicodedata.normalize('NFKC', str(text or '')).lower().split())
+
+def window_ratio(value, line):
+    """Best similarity between value and any same-length slice of line"""
+    if len(line) <= len(value):
+        return difflib.SequenceMatcher(None, value, line).ratio()
+    matcher = difflib.SequenceMatcher(None, value)
+    best = 0.0
+    for start in range(len(line) - len(value) + 1):
+        matcher.set_seq1(line[start:start + len(value)])
+        best = max(best, matcher.ratio())
+    return best
+
+def field_accuracy(text, expected):
+    """(fields read, fields expected): exact substring first, then best fuzzy line match"""
+    full = normalize(text)
+    lines = [normalize(line) for line in text.splitlines() if line.strip()]
+    found = total = 0
+    for book in expected:
+        for field in FIELDS:
+            value = normalize(book.get(field))
+            if not value or value == '-':
+                continue
+            total += 1
+            if value in full:
+                found += 1
+                continue
+            if any(window_ratio(value, line) >= MATCH_RATIO for line in lines):
+                found += 1
+    return found, total
+
+def bench(fixtures, engine_name, preset):
+    engine = get_engine(engine_name).load()
+    settings = PRESETS[preset]
+    prep_seconds = ocr_seconds = 0.0
+    found = total = 0
+    for path, expected in fixtures:
+        start = time.perf_counter()
+        image = preprocess(path, settings) if settings else path
+        prepared = time.perf_counter()
+        result = engine.read(image)
+        prep_seconds += prepared - start
+        ocr_seconds += time.perf_counter() - prepared
+        hits, fields = field_accuracy(result.text, expected)
+        found += hits
+        total += fields
+    count = len(fixtures)
+    return {
+        "engine": engine_name,
+        "preset": preset,
+        "prep_ms": prep_seconds / count * 1000,
+        "ocr_ms": ocr_seconds / count * 1000,
+        "wall_ms": (prep_seconds + ocr_seconds) / count * 1000,
+        "accuracy": found / total if total else 0.0
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark OCR preprocessing presets on a fixture set")
+    parser.add_argument("fixtures", nargs="?", default=os.path.join("fixtures", "ocr"))
+    parser.add_argument("--engine", nargs="+", default=["tesseract"], choices=("tesseract", "easyocr"))
+    parser.add_argument("--preset", nargs="+", default=sorted(PRESETS), choices=sorted(PRESETS))
+    parser.add_argument("--tolerance", type=float, default=0.01,
+                        help="accuracy a faster preset may give up and still be recommended")
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.fixtures) if os.path.isdir(args.fixtures) else []
+    if not fixtures:
+        print(f"⚠️  No fixtures (image + expected .json) in {args.fixtures}")
+        raise SystemExit(1)
+    print(f"{len(fixtures)} fixture image(s)\n")
+
+    for engine_name in args.engine:
+        rows = [bench(fixtures, engine_name, preset) for preset in args.preset]
+        stats = get_engine(engine_name).stats()
+        print(f"{engine_name} (model load {stats['load_seconds']:.1f}s, not included below)")
+        print(f"  {'preset':<18} {'prep ms':>8} {'ocr ms':>8} {'wall ms':>8} {'accuracy':>9}")
+        for row in sorted(rows, key=lambda row: (-row["accuracy"], row["wall_ms"])):
+            print(f"  {row['preset']:<18} {row['prep_ms']:8.0f} {row['ocr_ms']:8.0f} "
+                  f"{row['wall_ms']:8.0f} {row['accuracy']:9.1%}")
+
+        best = max(row["accuracy"] for row in rows)
+        keep = [row for row in rows if row["accuracy"] >= best - args.tolerance]
+        fastest = min(keep, key=lambda row: row["wall_ms"])
+        print(f"  → fastest within {args.tolerance:.0%} of the best accuracy: {fastest['preset']}\n")
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""End-to-end cost of the two Oricon paths, per genre.
+
+    python bench_oricon_paths.py [--genre Comics Literary] [--engine tesseract]
+
+structured: fetch the page + parse JSON-LD / embedded JSON / HTML items
+ocr:        headless-Chrome screenshot + OCR (no cache) + table parse
+
+Agreement is the share of structured titles the OCR path read at the same
+rank. The OCR path also needs Chromium, chromedriver and Tesseract
+installed in CI, which this does not time.
+"""
+import argparse
+import time
+import unicodedata
+
+from bs4 import BeautifulSoup
+
+from scrape_oricon import (ORICON_URLS, STRUCTURED_PARSERS, capture_screenshot,
+                           fetch_page, reliable, screenshot_path)
+
+def normalize(text):
+    return ''.join(unicodedata.normalize('NFKC', str(text or '')).lower().split())
+
+def bench_structured(url, genre):
+    start = time.perf_counter()
+    html = fetch_page(url, genre)
+    fetched = time.perf_counter()
+    books, method = [], None
+    if html:
+        soup = BeautifulSoup(html, 'html.parser')
+        for name, parse in STRUCTURED_PARSERS:
+            books = parse(soup)
+            if reliable(books):
+                method = name
+                break
+    done = time.perf_counter()
+    return {
+        "fetch_ms": (fetched - start) * 1000,
+        "extract_ms": (done - fetched) * 1000,
+        "total_ms": (done - start) * 1000,
+        "bytes": len(html.encode('utf-8')) if html else 0,
+        "method": method,
+        "books": {book.rank: book.title for book in books}
+    }
+
+def bench_ocr(url, genre, engine):
+    from ocr_preprocess import settings_for
+    from scrape_from_image import extract_from_image, parse_ocr_result
+
+    start = time.perf_counter()
+    path = capture_screenshot(url, screenshot_path(genre))
+    captured = time.perf_counter()
+    result = extract_from_image(path, engine, use_cache=False, settings=settings_for("oricon"))
+    books = parse_ocr_result(result) if result else []
+    done = time.perf_counter()
+    return {
+        "capture_ms": (captured - start) * 1000,
+        "extract_ms": (done - captured) * 1000,
+        "total_ms": (done - start) * 1000,
+        "books": {book["rank"]: book["title"] for book in books}
+    }
+
+def agreement(structured, ocr):
+    if not structured:
+        return 0.0
+    same = sum(1 for rank, title in structured.items() if normalize(ocr.get(rank)) == normalize(title))
+    return same / len(structured)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare structured extraction with screenshot OCR for Oricon")
+    parser.add_argument("--genre", nargs="+", default=list(ORICON_URLS), choices=list(ORICON_URLS))
+    parser.add_argument("--engine", default="tesseract", choices=("auto", "tesseract", "easyocr"))
+    parser.add_argument("--skip-ocr", action="store_true", help="time the structured path only")
+    args = parser.parse_args()
+
+    totals = {"structured": 0.0, "ocr": 0.0}
+    print(f"{'genre':<18} {'path':<11} {'fetch/shot':>10} {'extract':>8} {'total ms':>9} {'books':>6}  notes")
+    for genre in args.genre:
+        url = ORICON_URLS[genre]
+        structured = bench_structured(url, genre)
+        totals["structured"] += structured["total_ms"]
+        print(f"{genre:<18} {'structured':<11} {structured['fetch_ms']:10.0f} {structured['extract_ms']:8.0f} "
+              f"{structured['total_ms']:9.0f} {len(structured['books']):>6}  "
+              f"{structured['method'] or 'not reliable'}, {structured['bytes'] / 1024:.0f} KiB")
+        if args.skip_ocr:
+            continue
+        try:
+            ocr = bench_ocr(url, genre, args.engine)
+        except Exception as e:
+            print(f"{'':<18} {'ocr':<11} failed: {e}")
+            continue
+        totals["ocr"] += ocr["total_ms"]
+        print(f"{'':<18} {'ocr':<11} {ocr['capture_ms']:10.0f} {ocr['extract_ms']:8.0f} "
+              f"{ocr['total_ms']:9.0f} {len(ocr['books']):>6}  "
+              f"{agreement(structured['books'], ocr['books']):.0%} agree with structured")
+
+    print(f"\nstructured: {totals['structured'] / 1000:.1f}s total")
+    if totals["ocr"]:
+        print(f"ocr:        {totals['ocr'] / 1000:.1f}s total "
+              f"({totals['ocr'] / max(totals['structured'], 1):.0f}x the structured path)")
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Load test for query_server.py: cold cache, warm cache and conditional requests.
+
+    python bench_query_server.py [requests] [threads]
+"""
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+import ranking_store
+from query_server import make_server
+from translate_executor import percentile
+
+def sample_paths(db_path):
+    """A spread of requests over every endpoint, built from what is in the store"""
+    conn = ranking_store.connect(db_path)
+    try:
+        charts = conn.execute("SELECT DISTINCT source, genre FROM rankings LIMIT 20").fetchall()
+        books = conn.execute("SELECT isbn, title FROM rankings WHERE isbn IS NOT NULL LIMIT 40").fetchall()
+    finally:
+        conn.close()
+
+    paths = [f"/chart?source={quote(row['source'])}&genre={quote(row['genre'])}" for row in charts]
+    paths += [f"/history?isbn={row['isbn']}" for row in books]
+    paths += [f"/search?q={quote(row['title'][:2])}" for row in books[:10]]
+    paths += [f"/movers?source={source}" for source in ("tohan", "nippan", "oricon")]
+    return paths
+
+def fetch(base, path, etag=None):
+    request = urllib.request.Request(base + path)
+    if etag:
+        request.add_header("If-None-Match", etag)
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request) as response:
+            response.read()
+            status, tag = response.status, response.headers.get("ETag")
+    except urllib.error.HTTPError as e:
+        status, tag = e.code, e.headers.get("ETag")
+    return status, tag, (time.perf_counter() - start) * 1000
+
+def run(label, base, paths, total, threads, etags=None):
+    jobs = [paths[i % len(paths)] for i in range(total)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(lambda path: (path, fetch(base, path, (etags or {}).get(path))), jobs))
+    elapsed = time.perf_counter() - start
+
+    latencies = [ms for _, (_, _, ms) in results]
+    statuses = {}
+    for _, (status, _, _) in results:
+        statuses[status] = statuses.get(status, 0) + 1
+    print(f"{label:<12} {total / elapsed:8.0f} req/s  "
+          f"p50 {percentile(latencies, 50):6.2f} ms  p95 {percentile(latencies, 95):6.2f} ms  "
+          f"p99 {percentile(latencies, 99):6.2f} ms  {statuses}")
+    return {path: tag for path, (_, tag, _) in results}
+
+if __name__ == "__main__":
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+
+    paths = sample_paths(ranking_store.DB_PATH)
+    if not paths:
+        print(f"⚠️  {ranking_store.DB_PATH} has no rankings to query")
+        sys.exit(1)
+
+    server = make_server(port=0, quiet=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    print(f"{len(paths)} distinct requests, {total} requests over {threads} threads\n")
+
+    try:
+        server.cache.size = 0
+        run("uncached", base, paths, total, threads)
+        server.cache.size = 256
+        etags = run("warm cache", base, paths, total, threads)
+        run("304", base, paths, total, threads, etags)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    cache = server.cache
+    print(f"\ncache: {cache.hits} hits, {cache.misses} misses")
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Startup cost of each entry point: what importing it pulls in.
+
+    python bench_startup.py [pipeline scrape_tohan ...] [--budget 1.0] [--top 5]
+
+Each module is imported in a fresh interpreter with -X importtime. The
+report shows the wall time of that process (interpreter start included),
+the module's own cumulative import time, its slowest direct imports, and
+any heavy dependency that got loaded. Heavy dependencies should only load
+on the code paths that use them, so a clean run lists none. Exits 1 when
+a module is over budget or loads a heavy dependency at import.
+"""
+import argparse
+import subprocess
+import sys
+import time
+
+ENTRY_POINTS = (
+    "pipeline", "scrape_tohan", "scrape_nippan", "scrape_oricon", "scrape_from_image",
+    "ocr_cache", "translate_tables", "translate_tohan", "scraper_oricon",
+    "publish", "build_site", "export", "query_server", "search_index"
+)
+
+# Loaded lazily by the code that needs them; none should show up at import
+HEAVY = ("google.generativeai", "torch", "easyocr", "pytesseract", "numpy",
+         "PIL", "pdfplumber", "selenium")
+
+def parse_importtime(stderr):
+    """[(depth, module, self us, cumulative us)] from -X importtime output"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((depth, name.strip(), int(own), int(cumulative)))
+    return rows
+
+def measure(module):
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    rows = parse_importtime(proc.stderr)
+    if proc.returncode != 0:
+        error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "failed"
+        return {"module": module, "error": error}
+
+    # A module's line follows the lines of everything it imported, one level deeper
+    index = max((i for i, row in enumerate(rows) if row[1] == module), default=None)
+    own = rows[index] if index is not None else None
+    direct = []
+    if own:
+        for row in reversed(rows[:index]):
+            if row[0] <= own[0]:
+                break
+            if row[0] == own[0] + 1:
+                direct.append(row)
+    loaded = {name for _, name, _, _ in rows}
+    return {
+        "module": module,
+        "wall": wall,
+        "imports": own[3] / 1e6 if own else 0.0,
+        "direct": sorted(direct, key=lambda row: row[3], reverse=True),
+        "heavy": [dep for dep in HEAVY if dep in loaded]
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure startup import time of the entry points")
+    parser.add_argument("modules", nargs="*", default=list(ENTRY_POINTS))
+    parser.add_argument("--budget", type=float, default=1.0, help="seconds allowed per process start")
+    parser.add_argument("--top", type=int, default=3, help="slowest direct imports to list")
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'module':<20} {'wall s':>7} {'import s':>9}  slowest imports")
+    for module in args.modules:
+        result = measure(module)
+        if "error" in result:
+            print(f"{module:<20} {'-':>7} {'-':>9}  ❌ {result['error']}")
+            failed = True
+            continue
+        slowest = ", ".join(f"{name} {cumulative / 1000:.0f}ms"
+                            for _, name, _, cumulative in result["direct"][:args.top])
+        print(f"{module:<20} {result['wall']:7.3f} {result['imports']:9.3f}  {slowest}")
+        if result["heavy"]:
+            print(f"{'':<20} ⚠️  loads {', '.join(result['heavy'])} at import")
+            failed = True
+        if result["wall"] > args.budget:
+            print(f"{'':<20} ⚠️  over the {args.budget:.1f}s budget")
+            failed = True
+
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Speed and accuracy of the two OCR table parsers on a fixture set.
+
+    python bench_table_parse.py fixtures/ocr --engine tesseract easyocr
+
+Compares parse_ranking_table (split each text line on runs of spaces)
+with ocr_table.parse_boxes (rebuild rows and columns from the line boxes).
+Fixtures are the ones bench_ocr_preprocess.py uses (fixtures/ocr/<source>,
+rendered by make_ocr_fixtures.py), each read with its source's preset.
+OCR goes through the cache, so only parsing is timed.
+"""
+import argparse
+import contextlib
+import io
+import os
+import time
+
+from bench_ocr_preprocess import FIELDS, load_fixtures, normalize
+from ocr_cache import cached_read
+from ocr_engines import get_engine
+from ocr_preprocess import preprocess, settings_for
+from ocr_table import parse_boxes
+from scrape_from_image import parse_ranking_table
+
+PARSERS = {
+    "line-split": lambda result: parse_ranking_table(result.text),
+    "boxes": lambda result: parse_boxes(result.lines)
+}
+
+# Each parser runs this many times per result so small timings are measurable
+REPEAT = 20
+
+def score(books, expected):
+    """(fields matching the expected book of the same rank, fields expected)"""
+    by_rank = {book["rank"]: book for book in books}
+    found = total = 0
+    for book in expected:
+        parsed = by_rank.get(book.get("rank"), {})
+        for field in FIELDS:
+            value = normalize(book.get(field))
+            if not value or value == '-':
+                continue
+            total += 1
+            if normalize(parsed.get(field)) == value:
+                found += 1
+    return found, total
+
+def read(engine, path):
+    """OCR result for a fixture, preprocessed with the preset of its source directory"""
+    settings = settings_for(os.path.basename(os.path.dirname(path)))
+    prepare = (lambda image: preprocess(image, settings)) if settings else None
+    return cached_read(engine, path, settings, prepare)
+
+def bench(fixtures, engine_name):
+    engine = get_engine(engine_name)
+    results = [(read(engine, path), expected) for path, expected in fixtures]
+
+    rows = []
+    for name, parse in PARSERS.items():
+        seconds = 0.0
+        found = total = books = 0
+        for result, expected in results:
+            # parse_ranking_table reports progress; keep it out of the timings
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                for _ in range(REPEAT):
+                    parsed = parse(result)
+                seconds += (time.perf_counter() - start) / REPEAT
+            hits, fields = score(parsed, expected)
+            found += hits
+            total += fields
+            books += len(parsed)
+        rows.append({
+            "parser": name,
+            "ms": seconds / len(results) * 1000,
+            "books": books,
+            "accuracy": found / total if total else 0.0
+        })
+    return rows
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark line-split vs bounding-box table parsing")
+    parser.add_argument("fixtures", nargs="?", default=os.path.join("fixtures", "ocr"))
+    parser.add_argument("--engine", nargs="+", default=["tesseract"], choices=("tesseract", "easyocr"))
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.fixtures) if os.path.isdir(args.fixtures) else []
+    if not fixtures:
+        print(f"⚠️  No fixtures (image + expected .json) in {args.fixtures}")
+        raise SystemExit(1)
+    expected_books = sum(len(expected) for _, expected in fixtures)
+    print(f"{len(fixtures)} fixture image(s), {expected_books} expected books\n")
+
+    for engine_name in args.engine:
+        print(engine_name)
+        print(f"  {'parser':<12} {'ms/image':>9} {'books':>6} {'accuracy':>9}")
+        for row in bench(fixtures, engine_name):
+            print(f"  {row['parser']:<12} {row['ms']:9.2f} {row['books']:>6} {row['accuracy']:9.1%}")
+        print()
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+import html
+import os
+import sys
+from datetime import datetime
+
+from glossary import GENRE_TRANSLATIONS, SITE_STRINGS
+from publish import SOURCES
+from records import load_chart
+from translation_sidecars import load_sidecar, record_id
+
+TEMPLATE = 'index.html'
+SOURCE = 'tohan'
+LANGUAGES = ("en", "ja", "fr")
+
+# Genre shown first, as in displayDashboard
+DEFAULT_GENRE = "文芸書"
+
+# Header strings per language (site_strings.json, also loaded by index.html)
+UI_STRINGS = SITE_STRINGS["ui"]
+
+LANGUAGE_BUTTONS = (("en", "EN"), ("ja", "日本語"), ("fr", "FR"))
+
+MONTHS = {
+    "en": ["January", "February", "March", "April", "May", "June", "July",
+           "August", "September", "October", "November", "December"],
+    "fr": ["janvier", "février", "mars", "avril", "mai", "juin", "juillet",
+           "août", "septembre", "octobre", "novembre", "décembre"]
+}
+
+def esc(value):
+    return html.escape(str(value), quote=True)
+
+def format_updated(updated, lang):
+    """The 'Last updated' date as toLocaleDateString prints it for each language"""
+    try:
+        day = datetime.fromisoformat(updated.rstrip('Z'))
+    except (AttributeError, ValueError):
+        return updated or '-'
+    if lang == "ja":
+        return f"{day.year}年{day.month}月{day.day}日 {day:%H:%M}"
+    if lang == "fr":
+        return f"{day.day} {MONTHS['fr'][day.month - 1]} {day.year} à {day:%H:%M}"
+    return f"{MONTHS['en'][day.month - 1]} {day.day}, {day.year} at {day:%I:%M %p}"
+
+def format_price(price):
+    return f"{price:,}" if isinstance(price, int) else '-'
+
+def genre_label(genre, lang, sidecar):
+    names = GENRE_TRANSLATIONS.get(genre)
+    if names:
+        return names[lang]
+    return (sidecar["genres"].get(genre) if sidecar else None) or genre
+
+def localized(book, field, sidecar):
+    """Same fallback as localized() in index.html"""
+    entry = sidecar["records"].get(record_id(book)) if sidecar else None
+    value = entry.get(field) if entry else None
+    return value if value and value != '-' else book.get(field)
+
+def render_row(book, sidecar):
+    """One <tr> matching the #bookRow template"""
+    if book.movement:
+        label = {"new": "NEW", "re-entry": "RE"}.get(book.movement, book.movement)
+        detail = f"Peak #{book.peak_rank} · {book.periods_on_chart} on chart"
+        movement = f'<div class="movement" title="{esc(detail)}">{esc(label)}</div>'
+    else:
+        movement = '<div class="movement"></div>'
+
+    if book.isbn:
+        isbn_url = f"https://www.hanmoto.com/bd/isbn/{book.isbn.replace('-', '')}"
+        isbn = f'<a href="{esc(isbn_url)}" target="_blank">{esc(book.isbn)}</a>'
+    else:
+        isbn = '-'
+
+    return (
+        f'<tr><td><span class="rank">{book.rank or "-"}</span>{movement}</td>'
+        f'<td class="title-cell" data-field="title">{esc(localized(book, "title", sidecar))}</td>'
+        f'<td data-field="author">{esc(localized(book, "author", sidecar))}</td>'
+        f'<td class="publisher-cell" data-field="publisher">{esc(localized(book, "publisher", sidecar))}</td>'
+        f'<td class="price">{format_price(book.price)}</td>'
+        f'<td class="isbn-cell">{isbn}</td></tr>'
+    )
+
+def render_table(books, sidecar):
+    """A genre table matching the #bookTable template"""
+    if not books:
+        return '<p class="empty-state">No data available</p>'
+    rows = ''.join(render_row(book, sidecar) for book in books)
+    return (
+        '<div class="table-wrap"><table><thead><tr><th>Rank</th><th>Title</th><th>Author</th>'
+        f'<th>Publisher</th><th>Price</th><th>ISBN</th></tr></thead><tbody>{rows}</tbody></table></div>'
+    )
+
+def render_tabs(chart, lang, sidecar):
+    buttons, contents = [], []
+    for genre, books in chart.genres.items():
+        active = ' active' if genre == DEFAULT_GENRE else ''
+        label = esc(genre_label(genre, lang, sidecar))
+        buttons.append(
+            f'<button class="tab-btn{active}" data-genre="{esc(genre)}" '
+            f'onclick="switchTab({esc(repr(genre))})">{label}</button>'
+        )
+        contents.append(
+            f'<div class="tab-content{active}" id="tab-{esc(genre)}" data-rendered="true">'
+            f'{render_table(books, sidecar)}</div>'
+        )
+    return ''.join(buttons), ''.join(contents)
+
+def replace_once(page, old, new):
+    """Swap one fragment of the template; fail loudly if index.html changed shape"""
+    if page.count(old) != 1:
+        raise ValueError(f"{TEMPLATE}: expected exactly one {old!r}")
+    return page.replace(old, new)
+
+def drop_block(page, name):
+    """Remove a <!-- name --> ... <!-- /name --> block of the template"""
+    start = page.find(f'    <!-- {name}')
+    end = page.find(f'<!-- /{name} -->\n', start)
+    if start < 0 or end < 0:
+        raise ValueError(f"{TEMPLATE}: no {name} block")
+    return page[:start] + page[end + len(f'<!-- /{name} -->\n'):]
+
+def render_page(template, chart, lang):
+    sidecar = load_sidecar(SOURCE, lang) if lang != "ja" else None
+    strings, english = UI_STRINGS[lang], UI_STRINGS["en"]
+    buttons, contents = render_tabs(chart, lang, sidecar)
+
+    # The template is also the root page, which only redirects to a language
+    page = drop_block(template, "root-redirect")
+    page = replace_once(page, '<html lang="en">', f'<html lang="{lang}">')
+    # Pages live in <lang>/, while data/, translations/ and the favicon stay at the root
+    page = replace_once(page, '<head>', '<head>\n    <base href="../">')
+    page = replace_once(page, '<body>', f'<body data-prerendered="{lang}">')
+    page = replace_once(page, f'<h1>{english["title"]}</h1>', f'<h1>{esc(strings["title"])}</h1>')
+    page = replace_once(page, f'<p>{english["subtitle"]}</p>', f'<p>{esc(strings["subtitle"])}</p>')
+    page = replace_once(page, f'>{english["source"]}</p>', f'>{esc(strings["source"])}</p>')
+    page = replace_once(page, f'{english["refresh"]}\n', f'{esc(strings["refresh"])}\n')
+    page = replace_once(page, f'placeholder="{english["search"]}"', f'placeholder="{esc(strings["search"])}"')
+    page = replace_once(page, "let currentLanguage = 'en';", f"let currentLanguage = '{lang}';")
+
+    for code, name in LANGUAGE_BUTTONS:
+        active = ' active' if code == lang else ''
+        old_active = ' active' if code == "en" else ''
+        page = replace_once(
+            page,
+            f'<button class="lang-btn{old_active}" onclick="setLanguage(\'{code}\')">{name}</button>',
+            f'<a class="lang-btn{active}" href="{code}/" hreflang="{code}">{name}</a>'
+        )
+
+    week_info = f'<strong>January 2026</strong> | Last updated: {esc(format_updated(chart.updated, lang))}'
+    page = replace_once(page, '<span id="weekInfo">Loading...</span>', f'<span id="weekInfo">{week_info}</span>')
+    page = replace_once(page, '<div id="tabsContainer" class="tabs"></div>',
+                        f'<div id="tabsContainer" class="tabs">{buttons}</div>')
+    page = replace_once(page, '<div id="contentContainer"></div>',
+                        f'<div id="contentContainer">{contents}</div>')
+    return page
+
+def build_site(out_dir='.', languages=LANGUAGES):
+    """Write <lang>/index.html for each language, pre-rendered from the Tohan data"""
+    with open(TEMPLATE, 'r', encoding='utf-8') as f:
+        template = f.read()
+    chart = load_chart(SOURCES[SOURCE], SOURCE)
+
+    written = []
+    for lang in languages:
+        path = os.path.join(out_dir, lang, 'index.html')
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        page = render_page(template, chart, lang)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(page)
+        written.append(path)
+        print(f"🏗️  {path}: {len(chart.genres)} genres, {len(page.encode('utf-8'))} bytes")
+    return written
+
+if __name__ == "__main__":
+    # python build_site.py [en ja fr]
+    build_site(languages=sys.argv[1:] or LANGUAGES)
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+import sys
+
+from ranking_store import DB_PATH, append_snapshot, connect, normalize_isbn, normalize_title
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS movements (
+    source TEXT NOT NULL,
+    genre TEXT NOT NULL,
+    period TEXT NOT NULL,
+    book_key TEXT NOT NULL,
+    rank INTEGER NOT NULL,
+    last_rank INTEGER,
+    movement TEXT NOT NULL,
+    peak_rank INTEGER NOT NULL,
+    periods_on_chart INTEGER NOT NULL,
+    PRIMARY KEY (source, genre, book_key, period)
+);
+CREATE INDEX IF NOT EXISTS idx_movements_period ON movements (source, period);
+"""
+
+def book_key(isbn, title_norm):
+    """Identity used to follow a book between periods"""
+    return f"isbn:{isbn}" if isbn else f"title:{title_norm}"
+
+def movement_label(rank, last_rank):
+    """'+3' / '-2' / '=' for a book that was also on the previous chart"""
+    delta = last_rank - rank
+    return f"+{delta}" if delta > 0 else f"{delta}" if delta < 0 else "="
+
+def _previous_period(conn, source, period):
+    row = conn.execute(
+        "SELECT MAX(period) FROM snapshots WHERE source = ? AND period < ?", (source, period)
+    ).fetchone()
+    return row[0]
+
+def compute_period(conn, source, period):
+    """(Re)compute movements for one period from the rows just before it"""
+    previous = _previous_period(conn, source, period)
+    rows = conn.execute(
+        "SELECT genre, rank, isbn, title_norm FROM rankings WHERE source = ? AND period = ? "
+        "ORDER BY genre, rank",
+        (source, period)
+    ).fetchall()
+
+    computed = []
+    seen = set()
+    for row in rows:
+        key = book_key(row["isbn"], row["title_norm"])
+        # The same book twice in a chart (e.g. two rows without ISBN sharing a
+        # title) keeps its best rank
+        if (row["genre"], key) in seen:
+            print(f"   ⚠️  {source} {period} {row['genre']}: {key} listed again at #{row['rank']}, kept the higher rank")
+            continue
+        seen.add((row["genre"], key))
+        last = conn.execute(
+            "SELECT period, rank, peak_rank, periods_on_chart FROM movements "
+            "WHERE source = ? AND genre = ? AND book_key = ? AND period < ? "
+            "ORDER BY period DESC LIMIT 1",
+            (source, row["genre"], key, period)
+        ).fetchone()
+
+        if last is None:
+            last_rank, movement, peak, periods = None, "new", row["rank"], 1
+        elif last["period"] == previous:
+            last_rank = last["rank"]
+            movement = movement_label(row["rank"], last_rank)
+            peak, periods = min(last["peak_rank"], row["rank"]), last["periods_on_chart"] + 1
+        else:
+            last_rank, movement = None, "re-entry"
+            peak, periods = min(last["peak_rank"], row["rank"]), last["periods_on_chart"] + 1
+
+        computed.append((source, row["genre"], period, key, row["rank"], last_rank, movement, peak, periods))
+
+    with conn:
+        conn.execute("DELETE FROM movements WHERE source = ? AND period = ?", (source, period))
+        conn.executemany(
+            "INSERT INTO movements (source, genre, period, book_key, rank, last_rank, "
+            "movement, peak_rank, periods_on_chart) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            computed
+        )
+    return len(computed)
+
+def update_movements(source, db_path=DB_PATH):
+    """Compute movements for periods not processed yet, plus the newest one.
+
+    Earlier periods are never rescanned: each row only looks up its own
+    most recent movement row through the primary key.
+    """
+    conn = connect(db_path)
+    try:
+        conn.executescript(SCHEMA)
+        done = conn.execute(
+            "SELECT MAX(period) FROM movements WHERE source = ?", (source,)
+        ).fetchone()[0]
+        periods = [row[0] for row in conn.execute(
+            "SELECT period FROM snapshots WHERE source = ? AND (period > ? OR period = "
+            "(SELECT MAX(period) FROM snapshots WHERE source = ?)) ORDER BY period",
+            (source, done or '', source)
+        )]
+        total = sum(compute_period(conn, source, period) for period in periods)
+    finally:
+        conn.close()
+    print(f"📈 {source}: movements computed for {len(periods)} period(s), {total} rows")
+    return periods
+
+def movements_for(source, period, db_path=DB_PATH):
+    """(genre, book_key) -> movement row for one period"""
+    conn = connect(db_path, readonly=True)
+    try:
+        rows = conn.execute(
+            "SELECT genre, book_key, last_rank, movement, peak_rank, periods_on_chart "
+            "FROM movements WHERE source = ? AND period = ?", (source, period)
+        ).fetchall()
+    finally:
+        conn.close()
+    return {(row["genre"], row["book_key"]): dict(row) for row in rows}
+
+def top_movers(source, period=None, limit=10, db_path=DB_PATH):
+    """Biggest climbers of a period (latest by default), across genres"""
+    conn = connect(db_path, readonly=True)
+    try:
+        period = period or conn.execute(
+            "SELECT MAX(period) FROM movements WHERE source = ?", (source,)
+        ).fetchone()[0]
+        rows = conn.execute(
+            "SELECT m.genre, m.rank, m.last_rank, m.last_rank - m.rank AS delta, m.movement, "
+            "m.peak_rank, m.periods_on_chart, r.title, r.isbn "
+            "FROM movements m JOIN rankings r ON r.source = m.source AND r.period = m.period "
+            "AND r.genre = m.genre AND r.rank = m.rank AND m.book_key = CASE WHEN r.isbn IS NOT NULL "
+            "THEN 'isbn:' || r.isbn ELSE 'title:' || r.title_norm END "
+            "WHERE m.source = ? AND m.period = ? AND m.last_rank IS NOT NULL "
+            "ORDER BY delta DESC, m.rank LIMIT ?",
+            (source, period, limit)
+        ).fetchall()
+    finally:
+        conn.close()
+    return [dict(row) for row in rows]
+
+def annotate_chart(chart, period, db_path=DB_PATH):
+    """Copy last rank, movement, peak and periods on chart onto the chart's records"""
+    moves = movements_for(chart.source, period, db_path)
+    for genre, book in chart.records():
+        move = moves.get((genre, book_key(normalize_isbn(book.isbn), normalize_title(book.title))))
+        if move:
+            book.last_rank = move["last_rank"]
+            book.movement = move["movement"]
+            book.peak_rank = move["peak_rank"]
+            book.periods_on_chart = move["periods_on_chart"]
+    return chart
+
+def record_history(chart, period, db_path=DB_PATH):
+    """Append a scraped chart to the history, update movements and annotate the chart"""
+    append_snapshot(chart, period, db_path)
+    update_movements(chart.source, db_path)
+    return annotate_chart(chart, period, db_path)
+
+if __name__ == "__main__":
+    # python chart_movement.py tohan nippan oricon
+    for source in sys.argv[1:] or ["tohan", "nippan", "oricon"]:
+        update_movements(source)
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+
+import ranking_store
+
+FORMATS = ("csv", "ndjson", "parquet")
+
+COLUMNS = (
+    "source", "period", "genre", "rank", "title", "author", "publisher", "isbn",
+    "price", "sales", "last_rank", "movement", "peak_rank", "periods_on_chart"
+)
+
+# Rows fetched from SQLite (and written to Parquet) per batch
+BATCH_SIZE = 5000
+
+def iter_rows(source=None, genre=None, since=None, until=None, db_path=ranking_store.DB_PATH):
+    """Ranking rows as dicts, streamed from the store in batches.
+
+    Every filter is optional; since/until are inclusive periods
+    ('2026-01', '2026-W07') compared on their first day, so months and
+    weeks filter together. Movement columns are None where they have not
+    been computed. The store is opened read-only and checked here, before
+    any row is streamed: FileNotFoundError if it does not exist,
+    RuntimeError if chart_movement.py has not created its table yet.
+    """
+    sql = (
+        "SELECT r.source, r.period, r.genre, r.rank, r.title, r.author, r.publisher, r.isbn, "
+        "r.price, r.sales, m.last_rank, m.movement, m.peak_rank, m.periods_on_chart "
+        "FROM rankings r LEFT JOIN movements m ON m.source = r.source AND m.genre = r.genre "
+        "AND m.period = r.period AND m.book_key = CASE WHEN r.isbn IS NOT NULL "
+        "THEN 'isbn:' || r.isbn ELSE 'title:' || r.title_norm END WHERE 1 = 1"
+    )
+    params = []
+    for clause, value in (("r.source = ?", source), ("r.genre = ?", genre)):
+        if value:
+            sql += f" AND {clause}"
+            params.append(value)
+    for clause, value in (("period_start(r.period) >= ?", since), ("period_start(r.period) <= ?", until)):
+        if value:
+            sql += f" AND {clause}"
+            params.append(ranking_store.period_start(value).date().isoformat())
+    sql += " ORDER BY r.source, r.genre, period_start(r.period), r.rank"
+
+    conn = ranking_store.connect(db_path, readonly=True)
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    if "movements" not in tables:
+        conn.close()
+        raise RuntimeError(f"{db_path} has no movements table - run chart_movement.py first")
+    return _stream(conn, sql, params)
+
+def _stream(conn, sql, params):
+    try:
+        cursor = conn.execute(sql, params)
+        while True:
+            batch = cursor.fetchmany(BATCH_SIZE)
+            if not batch:
+                break
+            for row in batch:
+                yield dict(row)
+    finally:
+        conn.close()
+
+def write_csv(rows, out):
+    writer = csv.DictWriter(out, fieldnames=COLUMNS)
+    writer.writeheader()
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+    return count
+
+def write_ndjson(rows, out):
+    count = 0
+    for row in rows:
+        out.write(json.dumps(row, ensure_ascii=False, separators=(',', ':')) + '\n')
+        count += 1
+    return count
+
+def parquet_schema():
+    import pyarrow as pa
+
+    text, number = pa.string(), pa.int64()
+    types = {"rank": number, "price": number, "sales": number, "last_rank": number,
+             "peak_rank": number, "periods_on_chart": number}
+    return pa.schema([(column, types.get(column, text)) for column in COLUMNS])
+
+def write_parquet(rows, path):
+    """Write row groups of BATCH_SIZE rows, so only one batch is held in memory"""
+    # pyarrow is only loaded for Parquet exports
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet export needs pyarrow: pip install pyarrow")
+    schema = parquet_schema()
+    count = 0
+    batch = []
+    with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+        for row in rows:
+            batch.append(row)
+            if len(batch) == BATCH_SIZE:
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                count += len(batch)
+                batch = []
+        if batch:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            count += len(batch)
+    return count
+
+def export(fmt, output=None, **filters):
+    """Stream the matching rows to output (a path, or stdout for csv/ndjson).
+
+    Returns the number of rows written.
+    """
+    rows = iter_rows(**filters)
+    if fmt == "parquet":
+        if not output:
+            raise ValueError("Parquet export needs an output file")
+        return write_parquet(rows, output)
+
+    writer = write_csv if fmt == "csv" else write_ndjson
+    if not output:
+        return writer(rows, sys.stdout)
+    with open(output, 'w', encoding='utf-8', newline='') as f:
+        return writer(rows, f)
+
+def format_for(output):
+    ext = os.path.splitext(output or '')[1].lstrip('.').lower()
+    return ext if ext in FORMATS else "ndjson"
+
+if __name__ == "__main__":
+    # python export.py -o tohan_2025.csv --source tohan --since 2025-01 --until 2025-12
+    # python export.py --source oricon --genre 文庫 > oricon_bunko.ndjson
+    parser = argparse.ArgumentParser(description="Stream ranking history to CSV, NDJSON or Parquet")
+    parser.add_argument("-o", "--output", help="output file (stdout when omitted)")
+    parser.add_argument("-f", "--format", choices=FORMATS, help="defaults to the output file extension, else ndjson")
+    parser.add_argument("--source")
+    parser.add_argument("--genre")
+    parser.add_argument("--since", help="first period, e.g. 2025-01 or 2025-W10")
+    parser.add_argument("--until", help="last period (inclusive)")
+    parser.add_argument("--db", default=ranking_store.DB_PATH)
+    args = parser.parse_args()
+
+    fmt = args.format or format_for(args.output)
+    start = time.perf_counter()
+    try:
+        count = export(fmt, args.output, source=args.source, genre=args.genre,
+                       since=args.since, until=args.until, db_path=args.db)
+    except (FileNotFoundError, RuntimeError, ValueError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        sys.exit(1)
+    except BrokenPipeError:
+        # Output piped into head & co. that stopped reading
+        sys.stderr.close()
+        sys.exit(0)
+    print(f"✅ Exported {count} rows as {fmt} in {time.perf_counter() - start:.2f}s", file=sys.stderr)
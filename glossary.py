@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+import json
+import logging
+import os
+import unicodedata
+
+logger = logging.getLogger(__name__)
+
+GLOSSARY_PATH = 'glossary.json'
+
+# Fields whose values recur across runs and are safe to resolve offline
+GLOSSARY_FIELDS = ("genre", "publisher", "author")
+
+# A model translation is approved once it came back identical in this many runs
+APPROVAL_RUNS = 2
+
+# UI strings and genre names, shared with build_site.py and index.html
+SITE_STRINGS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'site_strings.json')
+
+def load_site_strings(path=SITE_STRINGS_PATH):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+SITE_STRINGS = load_site_strings()
+GENRE_TRANSLATIONS = SITE_STRINGS["genres"]
+
+# Publishers the Tohan parser recognizes at the end of a book entry
+PUBLISHERS = [
+    "SBクリエイティブ", "KADOKAWA", "幸福の科学出版", "オレンジページ", "小学館",
+    "神宮館", "Gakken", "朝日新聞出版", "ワン･パブリッシング", "幻冬舎",
+    "日本経済新聞出版", "高橋書店", "ときわ総合サービス", "サンクチュアリ出版",
+    "1万年堂出版", "PHP研究所", "毎日新聞出版", "日経BP", "ブラウンズブックス",
+    "スイッチ･パブリッシング", "すばる舎", "サンマーク出版", "ワニブックス",
+    "マガジンハウス", "福音館書店", "岩崎書店", "ハーパーコリンズ･ジャパン",
+    "文藝春秋", "新潮社", "双葉社", "飛鳥新社", "講談社", "東京創元社",
+    "宝島社", "ダイヤモンド社", "東洋経済新報社", "朝日新聞出版", "新星出版社",
+    "中央公論新社", "集英社", "光文社", "クラーケンコミックス", "NHK出版", "スイッチ･パブ"
+]
+
+# English names for PUBLISHERS (names already in latin script map to themselves)
+PUBLISHER_TRANSLATIONS = {
+    "SBクリエイティブ": "SB Creative",
+    "幸福の科学出版": "IRH Press",
+    "オレンジページ": "Orange Page",
+    "小学館": "Shogakukan",
+    "神宮館": "Jingukan",
+    "朝日新聞出版": "Asahi Shimbun Publications",
+    "ワン･パブリッシング": "One Publishing",
+    "幻冬舎": "Gentosha",
+    "日本経済新聞出版": "Nikkei Publishing",
+    "高橋書店": "Takahashi Shoten",
+    "ときわ総合サービス": "Tokiwa Sogo Service",
+    "サンクチュアリ出版": "Sanctuary Publishing",
+    "1万年堂出版": "Ichimannendo Publishing",
+    "PHP研究所": "PHP Institute",
+    "毎日新聞出版": "Mainichi Shimbun Publishing",
+    "日経BP": "Nikkei BP",
+    "ブラウンズブックス": "Brown's Books",
+    "スイッチ･パブリッシング": "Switch Publishing",
+    "スイッチ･パブ": "Switch Publishing",
+    "すばる舎": "Subarusya",
+    "サンマーク出版": "Sunmark Publishing",
+    "ワニブックス": "Wani Books",
+    "マガジンハウス": "Magazine House",
+    "福音館書店": "Fukuinkan Shoten",
+    "岩崎書店": "Iwasaki Shoten",
+    "ハーパーコリンズ･ジャパン": "HarperCollins Japan",
+    "文藝春秋": "Bungeishunju",
+    "新潮社": "Shinchosha",
+    "双葉社": "Futabasha",
+    "飛鳥新社": "Asuka Shinsha",
+    "講談社": "Kodansha",
+    "東京創元社": "Tokyo Sogensha",
+    "宝島社": "Takarajimasha",
+    "ダイヤモンド社": "Diamond",
+    "東洋経済新報社": "Toyo Keizai",
+    "新星出版社": "Shinsei Publishing",
+    "中央公論新社": "Chuokoron-Shinsha",
+    "集英社": "Shueisha",
+    "光文社": "Kobunsha",
+    "クラーケンコミックス": "Kraken Comics",
+    "NHK出版": "NHK Publishing"
+}
+
+def normalize_key(text):
+    """Normalize a lookup key (full/half-width forms, whitespace)"""
+    return ' '.join(unicodedata.normalize('NFKC', text).split())
+
+def seed_entries():
+    """Built-in entries from the genre map and the known publisher list"""
+    entries = {field: {} for field in GLOSSARY_FIELDS}
+    for ja, names in GENRE_TRANSLATIONS.items():
+        entries["genre"][normalize_key(ja)] = names["en"]
+    for publisher in PUBLISHERS:
+        english = PUBLISHER_TRANSLATIONS.get(publisher)
+        if english is None and publisher.isascii():
+            english = publisher
+        if english:
+            entries["publisher"][normalize_key(publisher)] = english
+    return entries
+
+class Glossary:
+    """Deterministic field -> Japanese -> English lookup used before any model call"""
+
+    def __init__(self, path=GLOSSARY_PATH):
+        self.path = path
+        self.entries = seed_entries()
+        self.pending = {field: {} for field in GLOSSARY_FIELDS}
+        self.hits = 0
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except Exception as e:
+            logger.warning(f"Could not load {self.path}: {e}")
+            return
+        for field in GLOSSARY_FIELDS:
+            self.entries[field].update(saved.get("approved", {}).get(field, {}))
+            self.pending[field].update(saved.get("pending", {}).get(field, {}))
+
+    def lookup(self, text, field):
+        """Return the known English form of text, or None"""
+        if field not in self.entries or not text:
+            return None
+        translation = self.entries[field].get(normalize_key(text))
+        if translation is not None:
+            self.hits += 1
+        return translation
+
+    def learn(self, text, field, translation):
+        """Record a model translation; promote it once it has been seen APPROVAL_RUNS times"""
+        if field not in self.entries or not translation or translation == text:
+            return
+        key = normalize_key(text)
+        if key in self.entries[field]:
+            return
+        candidate = self.pending[field].get(key)
+        if candidate and candidate["translation"] == translation:
+            candidate["runs"] += 1
+        else:
+            candidate = {"translation": translation, "runs": 1}
+        if candidate["runs"] >= APPROVAL_RUNS:
+            self.entries[field][key] = translation
+            self.pending[field].pop(key, None)
+            logger.info(f"📘 Glossary approved [{field}] {text} → {translation}")
+        else:
+            self.pending[field][key] = candidate
+
+    def save(self):
+        """Write approved and pending entries that are not built-in seeds"""
+        seeds = seed_entries()
+        data = {
+            "approved": {
+                field: {k: v for k, v in sorted(self.entries[field].items()) if seeds[field].get(k) != v}
+                for field in GLOSSARY_FIELDS
+            },
+            "pending": {field: dict(sorted(self.pending[field].items())) for field in GLOSSARY_FIELDS}
+        }
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
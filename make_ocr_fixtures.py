@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""Render the OCR benchmark fixtures from their expected books.
+
+    python make_ocr_fixtures.py [fixtures/ocr] [--font /path/to/ipaexg.ttf]
+
+Each fixtures/ocr/<source>/<name>.json (a list of {"rank", "title",
+"author", "publisher", "price"}, '-' for a column the page leaves empty)
+is drawn as a ranking-page screenshot next to it, in the style listed in
+STYLES: page chrome, skew, Retina scale, low contrast, JPEG artifacts.
+The JSON is the source of truth, so fixtures are edited there and
+re-rendered. Needs Pillow and a Japanese font.
+"""
+import argparse
+import json
+import os
+
+from PIL import Image, ImageDraw, ImageFont
+
+# Japanese fonts tried when --font is not given
+FONT_CANDIDATES = (
+    "/usr/share/fonts/opentype/ipaexfont-gothic/ipaexg.ttf",
+    "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
+    "/usr/share/fonts/noto-cjk/NotoSansCJK-Regular.ttc",
+    "/System/Library/Fonts/ヒラギノ角ゴシック W3.ttc",
+    "C:/Windows/Fonts/msgothic.ttc"
+)
+
+# Column x positions in CSS pixels: rank, title, author, publisher, price
+COLUMNS = (24, 80, 520, 680, 860)
+PAGE_WIDTH = 960
+ROW_HEIGHT = 40
+FONT_SIZE = 16
+
+# How each fixture deviates from a clean 1x screenshot
+STYLES = {
+    "nippan/general": {},
+    "nippan/paperback": {"chrome": True, "rotate": 1.2},
+    "nippan/comics": {"scale": 1.5, "dpi": 144},
+    "oricon/bunko": {"chrome": True, "badges": True, "muted": (130, 130, 130)},
+    "oricon/literary": {"background": (247, 243, 234), "muted": (110, 104, 96), "jpeg": 55}
+}
+
+HEADER = ("順位", "書名", "著者", "出版社", "価格")
+
+def find_font(path=None):
+    for candidate in ((path,) if path else FONT_CANDIDATES):
+        if candidate and os.path.exists(candidate):
+            return candidate
+    raise SystemExit("❌ No Japanese font found - pass --font")
+
+def render(books, style, font_path):
+    scale = style.get("scale", 1)
+    px = lambda value: round(value * scale)
+    font = ImageFont.truetype(font_path, px(FONT_SIZE))
+    bold = ImageFont.truetype(font_path, px(FONT_SIZE + 2))
+    background = style.get("background", (255, 255, 255))
+    muted = style.get("muted", (40, 40, 40))
+
+    chrome = style.get("chrome", False)
+    left = 200 if chrome else 0
+    top = 64 if chrome else 0
+    height = top + ROW_HEIGHT * (len(books) + 2) + (80 if chrome else 16)
+    image = Image.new('RGB', (px(PAGE_WIDTH + left), px(height)), background)
+    draw = ImageDraw.Draw(image)
+
+    if chrome:
+        # Site header and navigation around the table
+        draw.rectangle((0, 0, image.width, px(48)), fill=(34, 52, 70))
+        draw.text((px(24), px(14)), "週間ベストセラー ランキング", font=bold, fill=(255, 255, 255))
+        draw.rectangle((0, px(48), px(left - 24), image.height), fill=(236, 238, 240))
+        for i, item in enumerate(("総合", "文芸", "文庫", "新書", "コミック", "ビジネス")):
+            draw.text((px(24), px(80 + i * 36)), item, font=font, fill=(90, 90, 90))
+
+    y = top + 12
+    for x, label in zip(COLUMNS, HEADER):
+        draw.text((px(left + x), px(y)), label, font=bold, fill=(20, 20, 20))
+    y += ROW_HEIGHT
+    draw.line((px(left + 16), px(y - 8), px(left + PAGE_WIDTH - 16), px(y - 8)), fill=(160, 160, 160), width=px(1))
+
+    for i, book in enumerate(books):
+        if i % 2:
+            draw.rectangle((px(left + 16), px(y - 6), px(left + PAGE_WIDTH - 16), px(y + ROW_HEIGHT - 10)),
+                           fill=tuple(max(0, channel - 10) for channel in background))
+        rank = str(book["rank"])
+        if style.get("badges"):
+            cx, cy = px(left + COLUMNS[0] + 12), px(y + 9)
+            radius = px(14)
+            draw.ellipse((cx - radius, cy - radius, cx + radius, cy + radius), fill=(232, 96, 32))
+            draw.text((cx, cy), rank, font=bold, fill=(255, 255, 255), anchor="mm")
+        else:
+            draw.text((px(left + COLUMNS[0]), px(y)), rank, font=bold, fill=(20, 20, 20))
+        cells = (book["title"], book["author"], book["publisher"], f"{book['price']:,}円")
+        colors = ((20, 20, 20), muted, muted, muted)
+        for x, cell, color in zip(COLUMNS[1:], cells, colors):
+            if cell and cell != '-':
+                draw.text((px(left + x), px(y)), cell, font=font, fill=color)
+        y += ROW_HEIGHT
+
+    if style.get("rotate"):
+        image = image.rotate(style["rotate"], resample=Image.BICUBIC, expand=True, fillcolor=background)
+    return image
+
+def save(image, stem, style):
+    """Write the image next to its JSON; returns the path"""
+    # Only one image per stem, or load_fixtures would pair the JSON twice
+    for ext in ('.png', '.jpg'):
+        if os.path.exists(stem + ext):
+            os.remove(stem + ext)
+    options = {"dpi": (style["dpi"], style["dpi"])} if style.get("dpi") else {}
+    if style.get("jpeg"):
+        path = stem + '.jpg'
+        image.save(path, quality=style["jpeg"], **options)
+    else:
+        path = stem + '.png'
+        image.save(path, optimize=True, **options)
+    return path
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render OCR fixture screenshots from their expected JSON")
+    parser.add_argument("directory", nargs="?", default=os.path.join("fixtures", "ocr"))
+    parser.add_argument("--font", help="TrueType/OpenType font with Japanese glyphs")
+    args = parser.parse_args()
+
+    font_path = find_font(args.font)
+    for name, style in STYLES.items():
+        stem = os.path.join(args.directory, *name.split('/'))
+        with open(stem + '.json', 'r', encoding='utf-8') as f:
+            books = json.load(f)
+        path = save(render(books, style, font_path), stem, style)
+        print(f"🖼️  {path}: {len(books)} books, {os.path.getsize(path) // 1024} KB")
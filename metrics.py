@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""Run metrics: wall/CPU time per stage plus counters and timings, written
+as a JSON run report and optionally as a Prometheus textfile (for the
+node_exporter textfile collector).
+
+Counters go to the stage running in the current thread (see stage());
+work handed to a thread pool keeps its stage through bind(). Outside any
+stage they are filed under "-".
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+PREFIX = 'pipeline'
+
+REPORT_DIR = 'reports'
+REPORT_PATH = os.path.join(REPORT_DIR, 'run_report.json')
+# One compact report per line, for trends across scheduled runs
+HISTORY_PATH = os.path.join(REPORT_DIR, 'runs.ndjson')
+
+HELP = {
+    "http_requests": "HTTP requests made",
+    "http_errors": "HTTP requests that raised or returned 4xx/5xx",
+    "http_bytes": "Response bytes downloaded",
+    "http_latency_seconds": "HTTP request latency",
+    "pdf_pages": "PDF pages parsed",
+    "rows_extracted": "Chart rows extracted by the parsers",
+    "fuzzy_comparisons": "difflib title comparisons",
+    "cache_hits": "Cache hits",
+    "cache_misses": "Cache misses",
+    "translation_calls": "Translation model calls",
+    "translation_retries": "Translation calls retried after a rate limit",
+    "translation_latency_seconds": "Translation call latency"
+}
+
+_lock = threading.Lock()
+_local = threading.local()
+# (name, stage, labels) -> value
+_counters = {}
+# (name, stage, labels) -> [count, sum, min, max]
+_timings = {}
+# stage -> {"wall_seconds", "cpu_seconds"}
+_stages = {}
+_started = time.time()
+
+def reset():
+    global _started
+    with _lock:
+        _counters.clear()
+        _timings.clear()
+        _stages.clear()
+        _started = time.time()
+
+def current_stage():
+    return getattr(_local, "stage", None)
+
+def _key(name, labels):
+    return (name, current_stage() or "-", tuple(sorted(labels.items())))
+
+def inc(name, value=1, **labels):
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+def observe(name, seconds, **labels):
+    key = _key(name, labels)
+    with _lock:
+        timing = _timings.get(key)
+        if timing is None:
+            _timings[key] = [1, seconds, seconds, seconds]
+        else:
+            timing[0] += 1
+            timing[1] += seconds
+            timing[2] = min(timing[2], seconds)
+            timing[3] = max(timing[3], seconds)
+
+@contextmanager
+def stage(name):
+    """Attribute counters in this thread to stage name and time it.
+
+    CPU time is the stage thread's own (time.thread_time), so stages
+    running side by side do not count each other's work.
+    """
+    previous = current_stage()
+    _local.stage = name
+    wall, cpu = time.perf_counter(), time.thread_time()
+    try:
+        yield
+    finally:
+        entry = {
+            "wall_seconds": round(time.perf_counter() - wall, 4),
+            "cpu_seconds": round(time.thread_time() - cpu, 4)
+        }
+        with _lock:
+            _stages[name] = entry
+        _local.stage = previous
+
+def bind(fn):
+    """fn, counting under the caller's stage when it runs on another thread"""
+    name = current_stage()
+    if name is None:
+        return fn
+
+    def bound(*args, **kwargs):
+        previous = current_stage()
+        _local.stage = name
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _local.stage = previous
+    return bound
+
+def http_get(url, **kwargs):
+    """requests.get, counting the request, its bytes and latency"""
+    import requests
+
+    start = time.perf_counter()
+    try:
+        response = requests.get(url, **kwargs)
+    except Exception:
+        inc("http_requests")
+        inc("http_errors")
+        raise
+    observe("http_latency_seconds", time.perf_counter() - start)
+    inc("http_requests")
+    inc("http_bytes", len(response.content))
+    if response.status_code >= 400:
+        inc("http_errors")
+    return response
+
+def _label_key(name, labels):
+    if not labels:
+        return name
+    return name + '{' + ','.join(f"{key}={value}" for key, value in labels) + '}'
+
+def report(statuses=None):
+    """The run as a dict: per-stage timings and counters, plus totals.
+
+    statuses maps stage -> status (ran, skipped, failed, blocked), as
+    returned by pipeline.run_pipeline.
+    """
+    with _lock:
+        counters = dict(_counters)
+        timings = {key: list(value) for key, value in _timings.items()}
+        stages = {name: dict(entry) for name, entry in _stages.items()}
+
+    for name, status in (statuses or {}).items():
+        stages.setdefault(name, {"wall_seconds": 0.0, "cpu_seconds": 0.0})["status"] = status
+
+    totals = {}
+    for (name, stage_name, labels), value in counters.items():
+        key = _label_key(name, labels)
+        stages.setdefault(stage_name, {}).setdefault("counters", {})[key] = value
+        totals[key] = totals.get(key, 0) + value
+
+    for (name, stage_name, labels), (count, total, low, high) in timings.items():
+        stages.setdefault(stage_name, {}).setdefault("timings", {})[_label_key(name, labels)] = {
+            "count": count,
+            "sum": round(total, 4),
+            "mean": round(total / count, 4),
+            "min": round(low, 4),
+            "max": round(high, 4)
+        }
+        key = _label_key(name, labels) + "_count"
+        totals[key] = totals.get(key, 0) + count
+
+    return {
+        "started": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(_started)),
+        "seconds": round(time.time() - _started, 3),
+        "stages": stages,
+        "totals": totals
+    }
+
+def _atomic_write(path, text):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+def write_report(data, path=REPORT_PATH, history_path=HISTORY_PATH):
+    _atomic_write(path, json.dumps(data, ensure_ascii=False, indent=1) + '\n')
+    if history_path:
+        os.makedirs(os.path.dirname(history_path) or '.', exist_ok=True)
+        with open(history_path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(data, ensure_ascii=False, separators=(',', ':')) + '\n')
+    print(f"📊 Run report written to {path}")
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in pairs) + '}'
+
+def prometheus_text(statuses=None):
+    """The run in the Prometheus text format; every value is a gauge for the last run"""
+    with _lock:
+        counters = dict(_counters)
+        timings = {key: list(value) for key, value in _timings.items()}
+        stages = {name: dict(entry) for name, entry in _stages.items()}
+
+    lines = []
+
+    def family(name, help_text, samples):
+        metric = f"{PREFIX}_{name}"
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} gauge")
+        for labels, value in samples:
+            lines.append(f"{metric}{_labels(labels)} {value}")
+
+    family("last_run_timestamp_seconds", "Start of the last run", [((), round(_started, 3))])
+    family("run_seconds", "Duration of the last run", [((), round(time.time() - _started, 3))])
+    family("stage_wall_seconds", "Wall time per stage",
+           [((("stage", name),), entry["wall_seconds"]) for name, entry in sorted(stages.items())])
+    family("stage_cpu_seconds", "CPU time of the stage thread",
+           [((("stage", name),), entry["cpu_seconds"]) for name, entry in sorted(stages.items())])
+    if statuses:
+        family("stage_status", "1 for the status each stage ended with",
+               [((("stage", name), ("status", status)), 1) for name, status in statuses.items()])
+
+    by_name = {}
+    for (name, stage_name, labels), value in counters.items():
+        by_name.setdefault(name, []).append(((("stage", stage_name),) + labels, value))
+    for name in sorted(by_name):
+        family(name, HELP.get(name, name), sorted(by_name[name]))
+
+    by_name = {}
+    for (name, stage_name, labels), (count, total, _, _) in timings.items():
+        by_name.setdefault(name, []).append(((("stage", stage_name),) + labels, count, round(total, 6)))
+    for name in sorted(by_name):
+        samples = sorted(by_name[name])
+        family(f"{name}_count", HELP.get(name, name) + " (count)", [(labels, count) for labels, count, _ in samples])
+        family(f"{name}_sum", HELP.get(name, name) + " (sum)", [(labels, total) for labels, _, total in samples])
+
+    return '\n'.join(lines) + '\n'
+
+def write_prometheus(path, statuses=None):
+    """Write a textfile atomically, as the node_exporter textfile collector expects"""
+    _atomic_write(path, prometheus_text(statuses))
+    print(f"📈 Prometheus metrics written to {path}")
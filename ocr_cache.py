@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+import hashlib
+import json
+import os
+import sys
+import time
+
+import metrics
+from ocr_engines import OCRLine, OCRResult
+
+CACHE_DIR = 'ocr_cache'
+
+def image_hash(image):
+    """Content hash of an image file (or of a PIL image's pixels)"""
+    digest = hashlib.sha256()
+    if isinstance(image, (str, os.PathLike)):
+        with open(image, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    else:
+        digest.update(f"{image.mode}:{image.size}".encode('utf-8'))
+        digest.update(image.tobytes())
+    return digest.hexdigest()
+
+def cache_key(digest, engine, settings=None):
+    """Image hash + engine + engine options + preprocessing settings"""
+    material = json.dumps(
+        {"image": digest, "engine": engine.name, "config": engine.config(), "settings": settings or {}},
+        sort_keys=True
+    )
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()[:32]
+
+class OCRCache:
+    """OCR results on disk, one JSON file per key (raw text plus boxes).
+
+    Files are written atomically, so pool workers can share the directory.
+    """
+
+    def __init__(self, directory=CACHE_DIR):
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def get(self, key):
+        try:
+            with open(self.path(key), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.misses += 1
+            metrics.inc("cache_misses", cache="ocr")
+            return None
+        self.hits += 1
+        metrics.inc("cache_hits", cache="ocr")
+        lines = [OCRLine.from_list(item) for item in entry["lines"]]
+        return OCRResult(entry["engine"], lines, entry["text"], 0.0)
+
+    def put(self, key, result, **meta):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        entry = {
+            "engine": result.engine,
+            "text": result.text,
+            "lines": [line.as_list() for line in result.lines],
+            "seconds": round(result.seconds, 3),
+            "created": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+        }
+        entry.update(meta)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp, path)
+
+    def entries(self):
+        """Every cached entry, for re-running parsers offline"""
+        if not os.path.isdir(self.directory):
+            return
+        for folder in sorted(os.listdir(self.directory)):
+            for name in sorted(os.listdir(os.path.join(self.directory, folder))):
+                if name.endswith('.json'):
+                    with open(os.path.join(self.directory, folder, name), 'r', encoding='utf-8') as f:
+                        yield json.load(f)
+
+_default_cache = None
+
+def default_cache():
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = OCRCache()
+    return _default_cache
+
+def cached_read(engine, image, settings=None, prepare=None, cache=None):
+    """engine.read through the cache; a hit neither loads the model nor preprocesses.
+
+    image is the original file, which is what gets hashed. On a miss,
+    prepare(image) (e.g. preprocessing described by settings) gives what
+    the engine actually reads.
+    """
+    cache = cache or default_cache()
+    key = cache_key(image_hash(image), engine, settings)
+    result = cache.get(key)
+    if result is not None:
+        return result
+    result = engine.read(prepare(image) if prepare else image)
+    cache.put(key, result, image=image if isinstance(image, str) else None,
+              config=engine.config(), settings=settings or {})
+    return result
+
+if __name__ == "__main__":
+    # python ocr_cache.py list     - cached images and engines
+    # python ocr_cache.py parse    - re-run the table parser on every cached result
+    command = sys.argv[1] if len(sys.argv) > 1 else "list"
+    cache = OCRCache()
+    if command == "parse":
+        from scrape_from_image import parse_ocr_result
+
+        start = time.perf_counter()
+        total = 0
+        for entry in cache.entries():
+            lines = [OCRLine.from_list(item) for item in entry["lines"]]
+            books = parse_ocr_result(OCRResult(entry["engine"], lines, entry["text"]))
+            total += len(books)
+            print(f"{entry['engine']:<10} {len(books):>3} books  {entry.get('image')}")
+        print(f"\n{total} books parsed from cache in {(time.perf_counter() - start) * 1000:.0f} ms")
+    else:
+        for entry in cache.entries():
+            print(f"{entry['created']}  {entry['engine']:<10} {len(entry['lines']):>4} lines  "
+                  f"{entry['seconds']:>6.2f}s  {entry.get('image')}  {entry.get('settings') or ''}")
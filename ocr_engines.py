@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+import os
+import threading
+import time
+
+TESSERACT_PATH = r"C:\Program Files\Tesseract-OCR\tesseract.exe"  # Windows
+# TESSERACT_PATH = "/usr/bin/tesseract"  # Linux/Mac
+
+class OCRLine:
+    """One recognized line: text, confidence (0-1) and box (x0, y0, x1, y1) in pixels"""
+
+    __slots__ = ("text", "confidence", "box")
+
+    def __init__(self, text, confidence, box):
+        self.text = text
+        self.confidence = confidence
+        self.box = box
+
+    def as_list(self):
+        return [self.text, round(self.confidence, 4), list(self.box)]
+
+    @classmethod
+    def from_list(cls, item):
+        return cls(item[0], item[1], tuple(item[2]))
+
+    def __repr__(self):
+        return f"OCRLine({self.text!r}, {self.confidence:.2f})"
+
+class OCRResult:
+    """Output of one engine on one image"""
+
+    __slots__ = ("engine", "lines", "text", "seconds")
+
+    def __init__(self, engine, lines, text, seconds=0.0):
+        self.engine = engine
+        self.lines = lines
+        self.text = text
+        self.seconds = seconds
+
+    def mean_confidence(self):
+        if not self.lines:
+            return 0.0
+        return sum(line.confidence for line in self.lines) / len(self.lines)
+
+def _box(points):
+    xs = [point[0] for point in points]
+    ys = [point[1] for point in points]
+    return (int(min(xs)), int(min(ys)), int(max(xs)), int(max(ys)))
+
+class OCREngine:
+    """A model loaded once and reused for every image handed to it.
+
+    Subclasses implement _load() and _read(image). Inference is serialized
+    per engine, so one instance can be shared between threads.
+    """
+
+    name = "ocr"
+
+    def __init__(self, languages):
+        self.languages = tuple(languages)
+        self.model = None
+        self.load_seconds = 0.0
+        self.images = 0
+        self.inference_seconds = 0.0
+        self.lock = threading.Lock()
+
+    def load(self):
+        with self.lock:
+            if self.model is None:
+                start = time.perf_counter()
+                self.model = self._load()
+                self.load_seconds = time.perf_counter() - start
+                print(f"   🧠 {self.name} model loaded in {self.load_seconds:.1f}s")
+        return self
+
+    def read(self, image):
+        """OCR one image (path or PIL image)"""
+        self.load()
+        with self.lock:
+            start = time.perf_counter()
+            result = self._read(image)
+            result.seconds = time.perf_counter() - start
+            self.images += 1
+            self.inference_seconds += result.seconds
+        return result
+
+    def read_batch(self, images):
+        """OCR several images with the same warm model, in order"""
+        return [self.read(image) for image in images]
+
+    def config(self):
+        """Options that change the output, part of the OCR cache key"""
+        return {"languages": list(self.languages)}
+
+    def stats(self):
+        per_image = self.inference_seconds / self.images if self.images else 0.0
+        return {
+            "engine": self.name,
+            "load_seconds": round(self.load_seconds, 3),
+            "images": self.images,
+            "inference_seconds": round(self.inference_seconds, 3),
+            "seconds_per_image": round(per_image, 3)
+        }
+
+class EasyOCREngine(OCREngine):
+    name = "easyocr"
+
+    def __init__(self, languages=("ja", "en"), gpu=False, min_confidence=0.3):
+        super().__init__(languages)
+        self.gpu = gpu
+        self.min_confidence = min_confidence
+
+    def config(self):
+        return {"languages": list(self.languages), "min_confidence": self.min_confidence}
+
+    def _load(self):
+        import easyocr
+        return easyocr.Reader(list(self.languages), gpu=self.gpu)
+
+    def _read(self, image):
+        if not isinstance(image, (str, os.PathLike)):
+            import numpy
+            image = numpy.asarray(image.convert('RGB'))
+        lines = []
+        for item in self.model.readtext(image):
+            if len(item) >= 2:
+                confidence = float(item[2]) if len(item) > 2 else 0.0
+                lines.append(OCRLine(item[1], confidence, _box(item[0])))
+        # Only keep 30%+ confidence lines in the text
+        text = '\n'.join(line.text for line in lines if line.confidence > self.min_confidence)
+        return OCRResult(self.name, lines, text)
+
+class TesseractEngine(OCREngine):
+    name = "tesseract"
+
+    def __init__(self, languages=("jpn", "eng")):
+        super().__init__(languages)
+
+    def _load(self):
+        import pytesseract
+        # Set Tesseract path if on Windows
+        if os.name == 'nt':
+            pytesseract.pytesseract.tesseract_cmd = TESSERACT_PATH
+        return pytesseract
+
+    def _read(self, image):
+        if isinstance(image, (str, os.PathLike)):
+            from PIL import Image
+            image = Image.open(image)
+        data = self.model.image_to_data(image, lang='+'.join(self.languages), output_type=self.model.Output.DICT)
+
+        # Words -> lines, keyed by Tesseract's block/paragraph/line numbers
+        grouped = {}
+        for i, word in enumerate(data["text"]):
+            confidence = float(data["conf"][i])
+            if not word.strip() or confidence < 0:
+                continue
+            key = (data["block_num"][i], data["par_num"][i], data["line_num"][i])
+            grouped.setdefault(key, []).append(
+                (data["left"][i], data["top"][i], data["width"][i], data["height"][i], word, confidence)
+            )
+
+        lines = []
+        for words in grouped.values():
+            words.sort()
+            height = max(word[3] for word in words)
+            parts = [words[0][4]]
+            for previous, word in zip(words, words[1:]):
+                # A gap wider than the text height is a column break (two spaces, as
+                # parse_ranking_table splits on)
+                gap = word[0] - (previous[0] + previous[2])
+                parts.append('  ' if gap > height else ' ')
+                parts.append(word[4])
+            box = (min(w[0] for w in words), min(w[1] for w in words),
+                   max(w[0] + w[2] for w in words), max(w[1] + w[3] for w in words))
+            confidence = sum(w[5] for w in words) / len(words) / 100
+            lines.append(OCRLine(''.join(parts), confidence, box))
+
+        lines.sort(key=lambda line: (line.box[1], line.box[0]))
+        return OCRResult(self.name, lines, '\n'.join(line.text for line in lines))
+
+ENGINES = {
+    "easyocr": EasyOCREngine,
+    "tesseract": TesseractEngine
+}
+
+# Process-wide pool: one warm engine per (name, options)
+_pool = {}
+_pool_lock = threading.Lock()
+
+def get_engine(name="easyocr", **options):
+    """The shared engine for name and options, created (not yet loaded) on first use"""
+    key = (name, tuple(sorted(options.items())))
+    with _pool_lock:
+        engine = _pool.get(key)
+        if engine is None:
+            engine = _pool[key] = ENGINES[name](**options)
+    return engine
+
+def pool_stats():
+    """Load time kept apart from inference time, per engine in the pool"""
+    with _pool_lock:
+        engines = list(_pool.values())
+    return [engine.stats() for engine in engines if engine.model is not None]
+
+def print_pool_stats():
+    for stats in pool_stats():
+        print(f"⏱️  {stats['engine']}: model load {stats['load_seconds']:.1f}s, "
+              f"{stats['images']} image(s), {stats['seconds_per_image']:.2f}s/image inference")
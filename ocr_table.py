@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+import re
+import unicodedata
+
+from ocr_engines import OCRLine
+
+CELL_BREAK = re.compile(r'\s{2,}|\t')
+RANK_CELL = re.compile(r'^(\d{1,3})\s*位?$')
+RANK_PREFIX = re.compile(r'^(\d{1,3})\s*位?\s+(.+)$')
+
+# A column edge must be shared by this share of the ranked rows (at least two)
+MIN_COLUMN_SHARE = 0.3
+
+def _center_y(line):
+    return (line.box[1] + line.box[3]) / 2
+
+def _height(line):
+    return line.box[3] - line.box[1]
+
+def _median(values):
+    values = sorted(values)
+    return values[len(values) // 2] if values else 0
+
+def _display_width(text):
+    return sum(2 if unicodedata.east_asian_width(char) in 'WF' else 1 for char in text)
+
+def split_cells(lines):
+    """Split boxes holding several cells (Tesseract joins a whole table row,
+    with two spaces at column breaks) into one box per cell.
+
+    Cell edges are estimated from the text's display width across the box.
+    """
+    cells = []
+    for line in lines:
+        text = line.text.strip()
+        parts = [part for part in CELL_BREAK.split(text) if part.strip()]
+        if len(parts) < 2:
+            cells.append(line)
+            continue
+        x0, y0, x1, y1 = line.box
+        scale = (x1 - x0) / max(1, _display_width(text))
+        offset = 0
+        for part in parts:
+            start = text.index(part, offset)
+            end = start + len(part)
+            left = x0 + _display_width(text[:start]) * scale
+            right = x0 + _display_width(text[:end]) * scale
+            cells.append(OCRLine(part.strip(), line.confidence, (left, y0, right, y1)))
+            offset = end
+    return cells
+
+def cluster_rows(lines):
+    """Group boxes into table rows: one pass over the boxes sorted by vertical center.
+
+    A box joins the current row while its center stays within half a
+    median line height of the row's running center.
+    """
+    if not lines:
+        return []
+    tolerance = max(1.0, _median([_height(line) for line in lines]) / 2)
+    rows = []
+    row, total = [], 0.0
+    for line in sorted(lines, key=_center_y):
+        y = _center_y(line)
+        if row and abs(y - total / len(row)) > tolerance:
+            rows.append(sorted(row, key=lambda item: item.box[0]))
+            row, total = [], 0.0
+        row.append(line)
+        total += y
+    rows.append(sorted(row, key=lambda item: item.box[0]))
+    return rows
+
+def split_rank(cells):
+    """(rank, [(text, x0), ...]) with the rank taken off the front; rank is None if absent"""
+    if not cells:
+        return None, []
+    first = cells[0].text.strip()
+    rest = [(cell.text.strip(), cell.box[0]) for cell in cells[1:]]
+    match = RANK_CELL.match(first)
+    if match:
+        return int(match.group(1)), rest
+    match = RANK_PREFIX.match(first)
+    if match:
+        # Rank and title read as one box
+        return int(match.group(1)), [(match.group(2).strip(), cells[0].box[0])] + rest
+    return None, [(first, cells[0].box[0])] + rest
+
+def column_anchors(rows, gap):
+    """Left edges of the columns after the title, clustered over the ranked rows.
+
+    Clusters too sparse to be a column (a title OCR'd as two boxes, say)
+    are ignored.
+    """
+    edges = sorted(x for cells in rows for _, x in cells[1:])
+    clusters = []
+    for edge in edges:
+        if clusters and edge - clusters[-1][-1] <= gap:
+            clusters[-1].append(edge)
+        else:
+            clusters.append([edge])
+    support = max(2, int(len(rows) * MIN_COLUMN_SHARE))
+    return [min(cluster) for cluster in clusters if len(cluster) >= support]
+
+def assign_fields(cells, anchors, gap):
+    """title / author / publisher from one row's cells (title first)"""
+    fields = [[cells[0][0]], [], []]
+    for position, (text, x) in enumerate(cells[1:], start=1):
+        if anchors:
+            if x < anchors[0] - gap:
+                column = 0
+            else:
+                column = 1 + sum(1 for anchor in anchors[1:] if x >= anchor - gap)
+        else:
+            # No column structure found: title, author, publisher in reading order
+            column = position
+        fields[min(column, 2)].append(text)
+    return [' '.join(parts).strip() for parts in fields]
+
+def parse_boxes(lines):
+    """Rebuild rank/title/author/publisher rows from OCR line boxes.
+
+    Same output shape as scrape_from_image.parse_ranking_table.
+    """
+    lines = split_cells(lines)
+    ranked = []
+    for cells in cluster_rows(lines):
+        rank, texts = split_rank(cells)
+        if rank is not None and texts:
+            ranked.append((rank, texts))
+
+    gap = max(8, _median([_height(line) for line in lines]))
+    anchors = column_anchors([texts for _, texts in ranked], gap)
+
+    books = []
+    for rank, texts in ranked:
+        title, author, publisher = assign_fields(texts, anchors, gap)
+        # Filter out price data (円 symbol)
+        if '円' in publisher:
+            publisher = publisher.split('円')[0].strip()
+        if '円' in author:
+            author = author.split('円')[0].strip()
+        if title:
+            books.append({"rank": rank, "title": title, "author": author or "-", "publisher": publisher or "-"})
+    return books
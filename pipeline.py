@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""The whole pipeline in one runner: a DAG of stages per source.
+
+    fetch -> parse -> correct [-> translate] -> publish
+
+    python pipeline.py                      # every source
+    python pipeline.py tohan --lang en fr   # one source, then publish
+    python pipeline.py --force              # ignore the recorded hashes
+
+Each stage's inputs (the code it runs, the files it reads, the results of
+the stages it depends on and its options) are hashed. A stage whose hash
+matches its last successful run, and whose output files are unchanged
+since, is skipped and its saved result reused. Fetch stages always run:
+they are how new data gets in. Independent sources run in parallel.
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import metrics
+import profiling
+from publish import SOURCES, content_hash
+
+STATE_DIR = 'pipeline'
+STATE_FILE = 'state.json'
+
+# One chain per source runs at a time; stages inside a chain are sequential
+MAX_WORKERS = len(SOURCES)
+
+# Pause between two Oricon pages, as in scrape_all_oricon
+ORICON_DELAY = 2
+
+class Stage:
+    """One node of the DAG.
+
+    run(inputs) gets {dependency name: its result} and returns a
+    JSON-serializable result, or None on failure. code and files (globs
+    allowed) are hashed into the stage key; outputs are the files it writes.
+    """
+
+    __slots__ = ("name", "run", "deps", "code", "files", "outputs", "params", "always")
+
+    def __init__(self, name, run, deps=(), code=(), files=(), outputs=(), params=None, always=False):
+        self.name = name
+        self.run = run
+        self.deps = tuple(deps)
+        self.code = tuple(code)
+        self.files = tuple(files)
+        self.outputs = tuple(outputs)
+        self.params = params or {}
+        self.always = always
+
+    def __repr__(self):
+        return f"Stage({self.name!r})"
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+def hash_files(patterns):
+    """{path: hash} for every existing file matching the patterns"""
+    hashes = {}
+    for pattern in patterns:
+        for path in sorted(glob.glob(pattern)):
+            if os.path.isfile(path):
+                hashes[path] = file_hash(path)
+    return hashes
+
+def result_digest(result):
+    """Hash of a stage result; a chart's scrape time is not part of its content"""
+    if isinstance(result, dict) and "updated" in result:
+        result = {key: value for key, value in result.items() if key != "updated"}
+    return content_hash(json.dumps(result, ensure_ascii=False, sort_keys=True).encode('utf-8'))
+
+def stage_key(stage, dep_digests):
+    material = {
+        "code": hash_files(stage.code),
+        "files": hash_files(stage.files),
+        "deps": dep_digests,
+        "params": stage.params
+    }
+    return content_hash(json.dumps(material, ensure_ascii=False, sort_keys=True).encode('utf-8'))
+
+def load_state(state_dir=STATE_DIR):
+    try:
+        with open(os.path.join(state_dir, STATE_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def write_json(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+def artifact_path(state_dir, name):
+    return os.path.join(state_dir, f"{name}.json")
+
+def reuse(stage, key, entry, state_dir):
+    """The saved result if the stage can be skipped, else None"""
+    if stage.always or not entry or entry.get("key") != key:
+        return None
+    if hash_files(stage.outputs) != entry.get("outputs", {}):
+        return None
+    try:
+        with open(artifact_path(state_dir, stage.name), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+def run_stage(stage, inputs, dep_digests, entry, state_dir, force):
+    """(status, result, state entry, seconds); runs in a worker thread"""
+    with metrics.stage(stage.name), profiling.stage(stage.name):
+        return _run_stage(stage, inputs, dep_digests, entry, state_dir, force)
+
+def _run_stage(stage, inputs, dep_digests, entry, state_dir, force):
+    start = time.perf_counter()
+    key = stage_key(stage, dep_digests)
+    result = None if force else reuse(stage, key, entry, state_dir)
+    if result is not None:
+        print(f"⏭️  {stage.name}: inputs unchanged ({key}), skipped")
+        return "skipped", result, entry, time.perf_counter() - start
+
+    print(f"▶️  {stage.name}")
+    try:
+        result = stage.run(inputs)
+    except Exception as e:
+        print(f"❌ {stage.name} failed: {e}")
+        result = None
+    seconds = time.perf_counter() - start
+    if result is None:
+        return "failed", None, None, seconds
+
+    if not stage.always:
+        write_json(artifact_path(state_dir, stage.name), result)
+    entry = {
+        "key": key,
+        "digest": result_digest(result),
+        "outputs": hash_files(stage.outputs),
+        "finished": time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        "seconds": round(seconds, 3)
+    }
+    return "ran", result, entry, seconds
+
+def run_pipeline(stages, force=False, workers=MAX_WORKERS, state_dir=STATE_DIR):
+    """Run stages (listed in dependency order) as their dependencies finish.
+
+    Returns {stage name: {"status": ran|skipped|failed|blocked, "seconds": float}}.
+    """
+    names = set()
+    for stage in stages:
+        missing = [dep for dep in stage.deps if dep not in names]
+        if missing:
+            raise ValueError(f"{stage.name}: dependencies {missing} must be listed before it")
+        names.add(stage.name)
+
+    state = load_state(state_dir)
+    results, digests, report = {}, {}, {}
+    pending = list(stages)
+    running = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while pending or running:
+            waiting = []
+            for stage in pending:
+                if any(report.get(dep, {}).get("status") in ("failed", "blocked") for dep in stage.deps):
+                    report[stage.name] = {"status": "blocked", "seconds": 0.0}
+                    print(f"⛔ {stage.name}: blocked by a failed dependency")
+                elif all(dep in digests for dep in stage.deps):
+                    future = pool.submit(
+                        run_stage, stage,
+                        {dep: results[dep] for dep in stage.deps},
+                        {dep: digests[dep] for dep in stage.deps},
+                        state.get(stage.name), state_dir, force
+                    )
+                    running[future] = stage
+                else:
+                    waiting.append(stage)
+            pending = waiting
+            if not running:
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                status, result, entry, seconds = future.result()
+                report[stage.name] = {"status": status, "seconds": round(seconds, 3)}
+                if status == "failed":
+                    continue
+                results[stage.name] = result
+                digests[stage.name] = entry["digest"] if entry else result_digest(result)
+                if status == "ran" and not stage.always:
+                    state[stage.name] = entry
+                    write_json(os.path.join(state_dir, STATE_FILE), state)
+    return report
+
+def tohan_stages(langs):
+    def fetch(inputs):
+        from scrape_tohan import TOHAN_PDF_URL, download_tohan_pdf
+        path = download_tohan_pdf(TOHAN_PDF_URL)
+        return {"path": path, "hash": file_hash(path)} if path else None
+
+    def parse(inputs):
+        from scrape_tohan import parse_tohan_pdf
+        path = inputs["tohan.fetch"]["path"]
+        try:
+            data = parse_tohan_pdf(path)
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+        return data.as_dict() if data else None
+
+    def correct(inputs):
+        from records import Chart
+        from scrape_tohan import correct_overall_from_other_genres, save_data
+        data = correct_overall_from_other_genres(Chart.from_dict(inputs["tohan.parse"], "tohan"))
+        if not save_data(data):
+            return None
+        return {"file": SOURCES["tohan"], "hash": file_hash(SOURCES["tohan"])}
+
+    def translate(inputs):
+        from translate_tables import translate_data
+        from translation_sidecars import sidecar_path
+        if not all([translate_data(lang, "tohan") for lang in langs]):
+            return None
+        return {lang: file_hash(sidecar_path("tohan", lang)) for lang in langs}
+
+    stages = [
+        Stage("tohan.fetch", fetch, always=True),
+        Stage("tohan.parse", parse, ["tohan.fetch"], code=["scrape_tohan.py", "records.py"]),
+        Stage("tohan.correct", correct, ["tohan.parse"],
+              code=["scrape_tohan.py", "records.py", "chart_movement.py", "ranking_store.py"],
+              outputs=[SOURCES["tohan"]])
+    ]
+    if langs:
+        stages.append(Stage(
+            "tohan.translate", translate, ["tohan.correct"],
+            code=["translate_tables.py", "translate_executor.py", "translation_sidecars.py",
+                  "glossary.py", "records.py"],
+            # Approving glossary terms changes the published translations.
+            # The sidecars are outputs: a stage whose sidecars changed reruns.
+            files=["glossary.json", "site_strings.json"],
+            outputs=[os.path.join('translations', f"tohan.{lang}.json") for lang in langs],
+            params={"langs": list(langs)}
+        ))
+    return stages
+
+def nippan_stages():
+    def fetch(inputs):
+        from scrape_nippan import fetch_nippan
+        html = fetch_nippan()
+        return {"html": html} if html else None
+
+    def parse(inputs):
+        from scrape_nippan import parse_nippan
+        return parse_nippan(inputs["nippan.fetch"]["html"]).as_dict()
+
+    def correct(inputs):
+        from records import Chart
+        from scrape_nippan import apply_corrections, load_corrections, save_nippan
+        data = apply_corrections(Chart.from_dict(inputs["nippan.parse"], "nippan"), load_corrections())
+        save_nippan(data)
+        return {"file": SOURCES["nippan"], "hash": file_hash(SOURCES["nippan"])}
+
+    return [
+        Stage("nippan.fetch", fetch, always=True),
+        Stage("nippan.parse", parse, ["nippan.fetch"], code=["scrape_nippan.py", "records.py"]),
+        Stage("nippan.correct", correct, ["nippan.parse"],
+              code=["scrape_nippan.py", "records.py", "chart_movement.py", "ranking_store.py"],
+              files=["books_corrections.json"], outputs=[SOURCES["nippan"]])
+    ]
+
+def oricon_stages(ocr=True):
+    def fetch(inputs):
+        from scrape_oricon import ORICON_URLS, fetch_page
+        pages = {}
+        for i, (genre, url) in enumerate(ORICON_URLS.items()):
+            if i:
+                time.sleep(ORICON_DELAY)  # Be respectful
+            try:
+                pages[genre] = fetch_page(url, genre)
+            except Exception as e:
+                print(f"❌ Error fetching {genre}: {e}")
+                pages[genre] = None
+        return pages if any(pages.values()) or ocr else None
+
+    def parse(inputs):
+        from scrape_oricon import ORICON_URLS, extract_books, needs_ocr, new_chart
+        data = new_chart()
+        data.meta["extraction"] = {}
+        for genre, html in inputs["oricon.fetch"].items():
+            print(f"\n🔄 Extracting {genre} from Oricon...")
+            books, method = extract_books(html, ORICON_URLS[genre], genre, ocr)
+            data.genres[genre] = books
+            data.meta["extraction"][genre] = method
+        missing = needs_ocr(data)
+        if missing and not ocr:
+            print(f"⚠️  Structured extraction failed for: {', '.join(missing)}")
+            return None
+        return data.as_dict()
+
+    def correct(inputs):
+        from records import Chart
+        from scrape_oricon import apply_corrections, load_corrections, save_oricon
+        data = apply_corrections(Chart.from_dict(inputs["oricon.parse"], "oricon"), load_corrections())
+        save_oricon(data)
+        return {"file": SOURCES["oricon"], "hash": file_hash(SOURCES["oricon"])}
+
+    return [
+        Stage("oricon.fetch", fetch, always=True),
+        Stage("oricon.parse", parse, ["oricon.fetch"],
+              code=["scrape_oricon.py", "records.py", "scrape_from_image.py", "ocr_table.py"],
+              params={"ocr": ocr}),
+        Stage("oricon.correct", correct, ["oricon.parse"],
+              code=["scrape_oricon.py", "records.py", "chart_movement.py", "ranking_store.py"],
+              files=["books_corrections.json"], outputs=[SOURCES["oricon"]])
+    ]
+
+def publish_stage(deps):
+    def publish(inputs):
+        from build_site import LANGUAGES, build_site
+        from publish import publish_chunks
+        manifest = publish_chunks()
+        build_site(languages=LANGUAGES)
+        return {"hash": manifest.get("hash")}
+
+    return Stage(
+        "publish", publish, deps,
+        code=["publish.py", "search_index.py", "build_site.py", "glossary.py", "records.py"],
+        # Sources not run this time are published from their last output
+        files=list(SOURCES.values()) + [os.path.join('translations', '*.json'), 'index.html', 'site_strings.json'],
+        outputs=[os.path.join('data', 'manifest.json')] + [os.path.join(lang, 'index.html') for lang in ("en", "ja", "fr")]
+    )
+
+def build_stages(sources=tuple(SOURCES), langs=("en", "fr"), ocr=True, publish=True):
+    stages = []
+    if "tohan" in sources:
+        stages += tohan_stages(langs)
+    if "nippan" in sources:
+        stages += nippan_stages()
+    if "oricon" in sources:
+        stages += oricon_stages(ocr)
+    if publish:
+        finals = [stage.name for stage in stages if stage.name.endswith((".correct", ".translate"))]
+        stages.append(publish_stage(finals))
+    return stages
+
+def print_report(report):
+    print(f"\n{'stage':<18} {'status':<8} {'seconds':>8}")
+    for name, entry in report.items():
+        print(f"{name:<18} {entry['status']:<8} {entry['seconds']:8.2f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run fetch -> parse -> correct -> translate -> publish, skipping unchanged stages")
+    parser.add_argument("sources", nargs="*", metavar="source", help=f"sources to run (default: {' '.join(SOURCES)})")
+    parser.add_argument("--lang", nargs="*", default=["en", "fr"], help="Tohan translation languages (none to skip)")
+    parser.add_argument("--force", action="store_true", help="run every stage, ignoring the recorded hashes")
+    parser.add_argument("--no-ocr", action="store_true", help="no screenshot OCR fallback for Oricon")
+    parser.add_argument("--no-publish", action="store_true", help="skip data/ chunks and the pre-rendered pages")
+    parser.add_argument("--workers", type=int, default=MAX_WORKERS)
+    parser.add_argument("--report", default=metrics.REPORT_PATH,
+                        help=f"JSON run report, also appended to {metrics.HISTORY_PATH}")
+    parser.add_argument("--prom", metavar="PATH", help="also write a Prometheus textfile (e.g. for node_exporter)")
+    parser.add_argument("--profile", action="store_true",
+                        help=f"cProfile / tracemalloc reports per stage in {profiling.PROFILE_DIR} (stages run one at a time)")
+    args = parser.parse_args()
+
+    unknown = [source for source in args.sources if source not in SOURCES]
+    if unknown:
+        parser.error(f"unknown source(s): {', '.join(unknown)} (choose from {', '.join(SOURCES)})")
+
+    if args.profile:
+        profiling.enable()
+    start = time.perf_counter()
+    report = run_pipeline(
+        build_stages(args.sources or tuple(SOURCES), args.lang, not args.no_ocr, not args.no_publish),
+        force=args.force,
+        workers=1 if args.profile else args.workers
+    )
+    profiling.finish()
+    print_report(report)
+    print(f"\n⏱️  Pipeline finished in {time.perf_counter() - start:.1f}s")
+    
+    statuses = {name: entry["status"] for name, entry in report.items()}
+    metrics.write_report(metrics.report(statuses), args.report)
+    if args.prom:
+        metrics.write_prometheus(args.prom, statuses)
+    if any(entry["status"] in ("failed", "blocked") for entry in report.values()):
+        sys.exit(1)
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""Opt-in profiling for the entry points (--profile).
+
+    @entry_point                  # adds profile=False to an entry point
+    def main(): ...
+
+    with stage("tohan.parse"):    # no-op unless profiling
+        ...
+
+Per stage this writes <name>.prof (cProfile, open with pstats or
+snakeviz) and <name>.alloc.txt (tracemalloc: where the stage's memory
+grew), then a summary of the hottest functions across stages. A stage
+entered several times accumulates. cProfile follows the thread that
+entered the stage, so stages should run one at a time; work the stage
+hands to a thread pool is profiled through bind(). From Python 3.12
+cProfile hooks sys.monitoring, which sees every thread and allows one
+active profiler, so the stage's profiler covers its pool threads itself.
+"""
+import cProfile
+import functools
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+PROFILE_DIR = os.path.join('reports', 'profile')
+
+# Frames kept per allocation site, and sites listed per stage
+TRACEBACK_FRAMES = 1
+TOP_ALLOCATIONS = 25
+
+# Functions in the summary table
+TOP_FUNCTIONS = 20
+
+# Before 3.12 a profiler only sees the thread that enabled it
+PER_THREAD_PROFILES = sys.version_info < (3, 12)
+
+_enabled = False
+_out_dir = PROFILE_DIR
+_lock = threading.Lock()
+_local = threading.local()
+# stage -> {"profile", "threads", "seconds", "allocations", "peak"}
+_stages = {}
+
+def enable(out_dir=PROFILE_DIR):
+    global _enabled, _out_dir
+    _enabled = True
+    _out_dir = out_dir
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(TRACEBACK_FRAMES)
+    print(f"🔬 Profiling on - reports in {out_dir}")
+
+def enabled():
+    return _enabled
+
+def _ignored(stat):
+    filename = stat.traceback[0].filename
+    return filename == tracemalloc.__file__ or '<frozen importlib' in filename
+
+def _record_allocations(entry, before):
+    """Add the memory still held since snapshot before, by allocation site"""
+    after = tracemalloc.take_snapshot()
+    for stat in after.compare_to(before, 'lineno'):
+        if stat.size_diff <= 0 or _ignored(stat):
+            continue
+        frame = stat.traceback[0]
+        site = f"{frame.filename}:{frame.lineno}"
+        size, count = entry["allocations"].get(site, (0, 0))
+        entry["allocations"][site] = (size + stat.size_diff, count + stat.count_diff)
+
+@contextmanager
+def stage(name):
+    """Profile the block as stage name; no-op unless enabled (nested stages count toward the outer one)"""
+    if not _enabled or getattr(_local, "stage", None):
+        yield
+        return
+    _local.stage = name
+    entry = _stages.setdefault(name, {
+        "profile": cProfile.Profile(), "threads": [], "seconds": 0.0, "allocations": {}, "peak": 0
+    })
+    tracemalloc.reset_peak()
+    before = tracemalloc.take_snapshot()
+    start = time.perf_counter()
+    entry["profile"].enable()
+    try:
+        yield
+    finally:
+        entry["profile"].disable()
+        entry["seconds"] += time.perf_counter() - start
+        entry["peak"] = max(entry["peak"], tracemalloc.get_traced_memory()[1])
+        _record_allocations(entry, before)
+        _local.stage = None
+
+def bind(fn):
+    """fn, profiled into the caller's stage when it runs on a pool thread"""
+    name = getattr(_local, "stage", None)
+    if not _enabled or name is None or not PER_THREAD_PROFILES:
+        return fn
+    entry = _stages[name]
+
+    @functools.wraps(fn)
+    def bound(*args, **kwargs):
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profile.disable()
+            with _lock:
+                entry["threads"].append(profile)
+    return bound
+
+def entry_point(fn):
+    """Give fn a profile=False keyword: True profiles the call and writes the reports"""
+    @functools.wraps(fn)
+    def wrapper(*args, profile=False, **kwargs):
+        if not profile or _enabled:
+            return fn(*args, **kwargs)
+        enable()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            finish()
+    return wrapper
+
+def _stats(entry):
+    stats = pstats.Stats(entry["profile"], stream=io.StringIO())
+    for profile in entry["threads"]:
+        stats.add(profile)
+    return stats
+
+def _function_name(func):
+    filename, lineno, name = func
+    if filename == '~':
+        return name
+    return f"{os.path.basename(filename)}:{lineno}({name})"
+
+def hot_functions(limit=TOP_FUNCTIONS):
+    """[(stage, function, calls, self seconds, cumulative seconds)] by self time, across stages"""
+    rows = []
+    for name, entry in _stages.items():
+        stats = _stats(entry)
+        for func, (_, calls, tottime, cumtime, _) in stats.stats.items():
+            rows.append((name, _function_name(func), calls, tottime, cumtime))
+    rows.sort(key=lambda row: row[3], reverse=True)
+    return rows[:limit]
+
+def summary_text(limit=TOP_FUNCTIONS):
+    lines = [f"{'stage':<18} {'seconds':>8} {'peak MiB':>9}"]
+    for name, entry in _stages.items():
+        lines.append(f"{name:<18} {entry['seconds']:8.2f} {entry['peak'] / 2 ** 20:9.1f}")
+    lines.append("")
+    lines.append(f"{'stage':<18} {'calls':>9} {'self s':>8} {'cum s':>8}  function")
+    for name, function, calls, tottime, cumtime in hot_functions(limit):
+        lines.append(f"{name:<18} {calls:>9} {tottime:8.3f} {cumtime:8.3f}  {function}")
+    return '\n'.join(lines) + '\n'
+
+def finish():
+    """Write every stage's dumps and the summary, print the summary and stop profiling"""
+    global _enabled
+    if not _enabled:
+        return None
+    _enabled = False
+    tracemalloc.stop()
+    if not _stages:
+        return None
+    os.makedirs(_out_dir, exist_ok=True)
+    for name, entry in _stages.items():
+        _stats(entry).dump_stats(os.path.join(_out_dir, f"{name}.prof"))
+        top = sorted(entry["allocations"].items(), key=lambda item: item[1][0], reverse=True)[:TOP_ALLOCATIONS]
+        with open(os.path.join(_out_dir, f"{name}.alloc.txt"), 'w', encoding='utf-8') as f:
+            f.write(f"# {name}: memory held after the stage, by allocation site "
+                    f"(peak {entry['peak'] / 2 ** 20:.1f} MiB)\n")
+            for site, (size, count) in top:
+                f.write(f"{size / 1024:10.1f} KiB {count:>8} blocks  {site}\n")
+
+    text = summary_text()
+    path = os.path.join(_out_dir, 'summary.txt')
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    print(f"\n🔬 Hottest functions (self time)\n{text}")
+    print(f"🔬 Profiles written to {_out_dir}")
+    _stages.clear()
+    return path
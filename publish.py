@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+import gzip
+import hashlib
+import json
+import os
+
+from records import load_chart
+from search_index import build_index
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DATA_DIR = 'data'
+
+# Scraper outputs published for the dashboard
+SOURCES = {
+    "tohan": "data.js",
+    "nippan": "nippan_books.json",
+    "oricon": "oricon_books.json"
+}
+
+MANIFEST = 'manifest.json'
+
+# Search index across every source, next to the chunks
+SEARCH_STEM = 'search'
+
+def load_charts():
+    """Read every scraper output that exists into records.Chart objects"""
+    charts = {}
+    for source, path in SOURCES.items():
+        if not os.path.exists(path):
+            continue
+        try:
+            charts[source] = load_chart(path, source)
+        except Exception as e:
+            print(f"⚠️  Could not read {path}: {e}")
+    return charts
+
+def compact_json(obj):
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+
+def content_hash(raw):
+    return hashlib.sha256(raw).hexdigest()[:12]
+
+def genre_stem(source, genre):
+    """Chunk name prefix for a genre (ASCII, stable across runs)"""
+    return f"{source}/{hashlib.sha1(genre.encode('utf-8')).hexdigest()[:10]}"
+
+def write_variants(path, raw):
+    """Write raw bytes plus .gz and .br twins (gzip mtime=0 keeps bytes reproducible)"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(raw)
+    with open(path + '.gz', 'wb') as f:
+        f.write(gzip.compress(raw, compresslevel=9, mtime=0))
+    if brotli is not None:
+        with open(path + '.br', 'wb') as f:
+            f.write(brotli.compress(raw, quality=11))
+
+def write_hashed(out_dir, stem, text):
+    """Write <stem>.<hash>.json once; files are immutable, so existing ones are left alone"""
+    raw = text.encode('utf-8')
+    name = f"{stem}.{content_hash(raw)}.json"
+    path = os.path.join(out_dir, name)
+    if not os.path.exists(path):
+        write_variants(path, raw)
+    return name, len(raw)
+
+def read_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, MANIFEST), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+def prune(out_dir, manifest):
+    """Delete hashed chunks and search indexes the new manifest no longer references"""
+    keep = {entry["file"] for source in manifest["sources"].values() for entry in source["genres"]}
+    removed = 0
+    search_file = manifest.get("search", {}).get("file")
+    for name in os.listdir(out_dir):
+        base = name[:-3] if name.endswith(('.gz', '.br')) else name
+        if base.startswith(SEARCH_STEM + '.') and base != search_file:
+            os.remove(os.path.join(out_dir, name))
+            removed += 1
+    for source in SOURCES:
+        folder = os.path.join(out_dir, source)
+        if not os.path.isdir(folder):
+            continue
+        for name in os.listdir(folder):
+            base = name[:-3] if name.endswith(('.gz', '.br')) else name
+            if f"{source}/{base}" not in keep:
+                os.remove(os.path.join(folder, name))
+                removed += 1
+    return removed
+
+def publish_chunks(out_dir=DATA_DIR, charts=None):
+    """Write data/manifest.json plus one minified, content-hashed chunk per source and genre,
+    and the cross-source search index (search_index.py).
+
+    charts maps source -> records.Chart (read from the scraper outputs by
+    default). Nothing is written when the data hash matches the current manifest.
+    """
+    if charts is None:
+        charts = load_charts()
+    datasets = {source: chart.as_dict() for source, chart in charts.items()}
+
+    data_hash = content_hash(compact_json(datasets).encode('utf-8'))
+    previous = read_manifest(out_dir)
+    if previous and previous.get("hash") == data_hash and "search" in previous:
+        print(f"⏭️  Data unchanged ({data_hash}), nothing to publish")
+        return previous
+
+    manifest = {"hash": data_hash, "sources": {}}
+    for source, data in datasets.items():
+        genres = []
+        for genre, books in data.get("genres", {}).items():
+            file, size = write_hashed(out_dir, genre_stem(source, genre), compact_json(books))
+            genres.append({"name": genre, "file": file, "rows": len(books), "bytes": size})
+
+        manifest["sources"][source] = {
+            "updated": data.get("updated"),
+            "genres": genres
+        }
+        print(f"📦 {source}: {len(genres)} genre chunks")
+
+    index = build_index(charts)
+    file, size = write_hashed(out_dir, SEARCH_STEM, compact_json(index))
+    manifest["search"] = {"file": file, "docs": len(index["docs"]), "bytes": size}
+    print(f"🔍 Search index: {len(index['docs'])} docs, {len(index['postings'])} grams, {size} bytes")
+
+    # The manifest keeps a fixed name: it is the one file clients revalidate
+    write_variants(os.path.join(out_dir, MANIFEST), compact_json(manifest).encode('utf-8'))
+    removed = prune(out_dir, manifest)
+    print(f"✅ Manifest {data_hash} written to {os.path.join(out_dir, MANIFEST)} ({removed} stale files removed)")
+    if brotli is None:
+        print("ℹ️  brotli not installed - skipped .br variants")
+    return manifest
+
+if __name__ == "__main__":
+    publish_chunks()
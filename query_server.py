@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+import argparse
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import chart_movement
+import ranking_store
+
+DEFAULT_PORT = 8765
+CACHE_SIZE = 256
+
+class ResponseCache:
+    """Thread-safe LRU of encoded responses: key -> (etag, body)"""
+
+    def __init__(self, size=CACHE_SIZE):
+        self.size = size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, entry):
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+def strong_etag(body):
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+def etag_matches(header, etag):
+    """If-None-Match check (strong comparison, '*' matches anything)"""
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(',')]
+    return '*' in tags or etag in tags
+
+def db_version(db_path):
+    """Changes whenever a scrape writes to the store, so cached responses expire with it"""
+    try:
+        stat = os.stat(db_path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+def _int_param(params, name, default):
+    try:
+        return int(params.get(name, default))
+    except (TypeError, ValueError):
+        raise ValueError(f"'{name}' must be an integer")
+
+def _required(params, name):
+    if not params.get(name):
+        raise ValueError(f"missing '{name}' parameter")
+    return params[name]
+
+def route_chart(params, db_path):
+    source = params.get("source", "tohan")
+    genre = _required(params, "genre")
+    period = params.get("period") or ranking_store.latest_period(source, db_path)
+    moves = chart_movement.movements_for(source, period, db_path) if period else {}
+    books = ranking_store.chart(source, genre, period, db_path)
+    for book in books:
+        key = chart_movement.book_key(book["isbn"], ranking_store.normalize_title(book["title"]))
+        move = moves.get((genre, key))
+        if move:
+            book.update({field: move[field] for field in ("last_rank", "movement", "peak_rank", "periods_on_chart")})
+    return {"source": source, "genre": genre, "period": period, "books": books}
+
+def route_history(params, db_path):
+    if params.get("isbn"):
+        rows = ranking_store.isbn_history(params["isbn"], params.get("since"), params.get("until"), db_path)
+        return {"isbn": ranking_store.normalize_isbn(params["isbn"]), "history": rows}
+    title = _required(params, "title")
+    return {"title": title, "history": ranking_store.title_history(title, db_path)}
+
+def route_movers(params, db_path):
+    source = params.get("source", "tohan")
+    limit = _int_param(params, "limit", 10)
+    period = params.get("period") or ranking_store.latest_period(source, db_path)
+    movers = chart_movement.top_movers(source, period, limit, db_path)
+    return {"source": source, "period": period, "movers": movers}
+
+def route_search(params, db_path):
+    query = _required(params, "q")
+    limit = _int_param(params, "limit", 20)
+    return {"q": query, "results": ranking_store.search_titles(query, limit, db_path)}
+
+ROUTES = {
+    "/chart": route_chart,
+    "/history": route_history,
+    "/movers": route_movers,
+    "/search": route_search
+}
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """Read-only JSON API over history/rankings.sqlite3"""
+
+    server_version = "RankingQuery/1.0"
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        route = ROUTES.get(url.path.rstrip('/') or '/')
+        if route is None:
+            return self.send_json(404, {"error": f"unknown endpoint {url.path}", "endpoints": sorted(ROUTES)})
+
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        key = (url.path, tuple(sorted(params.items())), db_version(self.server.db_path))
+        cached = self.server.cache.get(key)
+        if cached is None:
+            try:
+                payload = route(params, self.server.db_path)
+            except ValueError as e:
+                return self.send_json(400, {"error": str(e)})
+            except FileNotFoundError as e:
+                return self.send_json(503, {"error": str(e)})
+            except Exception as e:
+                self.log_error("%s failed: %r", url.path, e)
+                return self.send_json(500, {"error": f"internal error ({type(e).__name__})"})
+            body = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            cached = (strong_etag(body), body)
+            self.server.cache.put(key, cached)
+
+        etag, body = cached
+        if etag_matches(self.headers.get("If-None-Match"), etag):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            return
+        self.send_body(200, body, etag)
+
+    def send_json(self, status, payload):
+        self.send_body(status, json.dumps(payload, ensure_ascii=False).encode('utf-8'))
+
+    def send_body(self, status, body, etag=None):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        if etag:
+            self.send_header("ETag", etag)
+            # Clients may keep the body but must revalidate: the data changes with every scrape
+            self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+class QueryServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default backlog of 5 drops connections under concurrent load
+    request_queue_size = 128
+
+def make_server(host="127.0.0.1", port=DEFAULT_PORT, db_path=ranking_store.DB_PATH,
+                cache_size=CACHE_SIZE, quiet=False):
+    server = QueryServer((host, port), QueryHandler)
+    server.db_path = db_path
+    server.cache = ResponseCache(cache_size)
+    server.quiet = quiet
+    return server
+
+if __name__ == "__main__":
+    # python query_server.py --port 8765
+    # curl 'http://127.0.0.1:8765/chart?source=tohan&genre=文芸書'
+    parser = argparse.ArgumentParser(description="Local read-only query server for the ranking history")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--db", default=ranking_store.DB_PATH)
+    parser.add_argument("--cache-size", type=int, default=CACHE_SIZE)
+    parser.add_argument("--quiet", action="store_true", help="don't log every request")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.db):
+        print(f"⚠️  {args.db} does not exist yet - run a scraper first")
+    server = make_server(args.host, args.port, args.db, args.cache_size, args.quiet)
+    print(f"🔎 Serving {args.db} on http://{args.host}:{args.port} ({', '.join(sorted(ROUTES))})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+import os
+import re
+import sqlite3
+import sys
+import time
+import unicodedata
+from datetime import datetime
+from pathlib import Path
+
+DB_PATH = os.path.join('history', 'rankings.sqlite3')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL,
+    period TEXT NOT NULL,
+    captured_at TEXT NOT NULL,
+    UNIQUE (source, period)
+);
+CREATE TABLE IF NOT EXISTS rankings (
+    snapshot_id INTEGER NOT NULL REFERENCES snapshots(id) ON DELETE CASCADE,
+    source TEXT NOT NULL,
+    period TEXT NOT NULL,
+    genre TEXT NOT NULL,
+    rank INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    title_norm TEXT NOT NULL,
+    author TEXT,
+    publisher TEXT,
+    isbn TEXT,
+    price INTEGER,
+    sales INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_rankings_isbn ON rankings (isbn, period);
+CREATE INDEX IF NOT EXISTS idx_rankings_title ON rankings (title_norm, period);
+CREATE INDEX IF NOT EXISTS idx_rankings_chart ON rankings (source, genre, period, rank);
+CREATE INDEX IF NOT EXISTS idx_rankings_period ON rankings (period);
+"""
+
+def normalize_title(title):
+    """Title key used for lookups: NFKC, case-folded, without whitespace"""
+    return ''.join(unicodedata.normalize('NFKC', title or '').casefold().split())
+
+def normalize_isbn(isbn):
+    """ISBN digits only ('-' and empty values become None)"""
+    digits = ''.join(ch for ch in (isbn or '') if ch.isdigit() or ch in 'Xx')
+    return digits.upper() or None
+
+def month_period(pdf_url):
+    """'.../202601.pdf' -> '2026-01'"""
+    match = re.search(r'(\d{4})(\d{2})\.pdf$', pdf_url)
+    if match:
+        return f"{match.group(1)}-{match.group(2)}"
+    return datetime.now().strftime('%Y-%m')
+
+def week_period(day=None):
+    """ISO week of a date, e.g. '2026-W07'"""
+    year, week, _ = (day or datetime.now()).isocalendar()
+    return f"{year}-W{week:02d}"
+
+def connect(db_path=DB_PATH, readonly=False):
+    """Open the store, creating the schema on first use.
+
+    readonly opens an existing store without writing anything (no
+    directory, file or schema); FileNotFoundError if it does not exist.
+    """
+    if readonly:
+        if not os.path.exists(db_path):
+            raise FileNotFoundError(f"{db_path} does not exist - run a scraper first")
+        conn = sqlite3.connect(Path(db_path).resolve().as_uri() + '?mode=ro', uri=True)
+        conn.row_factory = sqlite3.Row
+        conn.create_function("period_start", 1, _period_start_sql, deterministic=True)
+        return conn
+    if os.path.dirname(db_path):
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    conn.create_function("period_start", 1, _period_start_sql, deterministic=True)
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.executescript(SCHEMA)
+    return conn
+
+def append_snapshot(chart, period, db_path=DB_PATH):
+    """Store one scraped records.Chart under chart.source and period.
+
+    Re-running the same source and period replaces that snapshot.
+    Returns the number of rows stored.
+    """
+    source = chart.source
+    rows = []
+    for genre, book in chart.records():
+        if book.rank is None or not book.title:
+            continue
+        rows.append((
+            source, period, genre, book.rank,
+            book.title, normalize_title(book.title),
+            book.author, book.publisher,
+            normalize_isbn(book.isbn), book.price, book.sales
+        ))
+
+    conn = connect(db_path)
+    try:
+        with conn:
+            conn.execute("DELETE FROM snapshots WHERE source = ? AND period = ?", (source, period))
+            cursor = conn.execute(
+                "INSERT INTO snapshots (source, period, captured_at) VALUES (?, ?, ?)",
+                (source, period, chart.updated or datetime.now().isoformat() + "Z")
+            )
+            snapshot_id = cursor.lastrowid
+            conn.executemany(
+                "INSERT INTO rankings (snapshot_id, source, period, genre, rank, title, title_norm, "
+                "author, publisher, isbn, price, sales) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(snapshot_id,) + row for row in rows]
+            )
+    finally:
+        conn.close()
+
+    print(f"🗄️  Stored {len(rows)} {source} rows for {period} in {db_path}")
+    return len(rows)
+
+def _query(sql, params, db_path):
+    conn = connect(db_path, readonly=True)
+    try:
+        return [dict(row) for row in conn.execute(sql, params)]
+    finally:
+        conn.close()
+
+def isbn_history(isbn, since=None, until=None, db_path=DB_PATH):
+    """Every rank an ISBN held, oldest period first.
+
+    since/until are inclusive periods compared on their first day, so
+    months and ISO weeks filter together.
+    """
+    sql = "SELECT source, period, genre, rank, title FROM rankings WHERE isbn = ?"
+    params = [normalize_isbn(isbn)]
+    if since:
+        sql += " AND period_start(period) >= ?"
+        params.append(_period_start_sql(since))
+    if until:
+        sql += " AND period_start(period) <= ?"
+        params.append(_period_start_sql(until))
+    return _query(sql + " ORDER BY period_start(period), source, genre", params, db_path)
+
+def title_history(title, db_path=DB_PATH):
+    """Every rank held by a title (matched on the normalized title)"""
+    return _query(
+        "SELECT source, period, genre, rank, title, isbn FROM rankings "
+        "WHERE title_norm = ? ORDER BY period, source, genre",
+        (normalize_title(title),), db_path
+    )
+
+def latest_period(source, db_path=DB_PATH):
+    rows = _query("SELECT MAX(period) AS period FROM snapshots WHERE source = ?", (source,), db_path)
+    return rows[0]["period"] if rows else None
+
+def chart(source, genre, period=None, db_path=DB_PATH):
+    """One genre chart for a period (latest by default)"""
+    period = period or latest_period(source, db_path)
+    return _query(
+        "SELECT rank, title, author, publisher, isbn, price, sales FROM rankings "
+        "WHERE source = ? AND genre = ? AND period = ? ORDER BY rank",
+        (source, genre, period), db_path
+    )
+
+def period_start(period):
+    """First day of a period ('2026-01' or '2026-W07'), so months and weeks compare"""
+    if '-W' in period:
+        return datetime.strptime(period + '-1', '%G-W%V-%u')
+    return datetime.strptime(period, '%Y-%m')
+
+def _period_start_sql(period):
+    """period_start() for SQL: filter and sort months and weeks together"""
+    return period_start(period).date().isoformat()
+
+def search_titles(query, limit=20, db_path=DB_PATH):
+    """Titles containing query (normalized), most recent appearance first"""
+    pattern = '%' + normalize_title(query).replace('%', '').replace('_', '') + '%'
+    # Latest period per source: sources number their periods differently (months, ISO weeks)
+    rows = _query(
+        "SELECT title_norm, title, isbn, source, MAX(period) AS last_period, MIN(rank) AS best_rank "
+        "FROM rankings WHERE title_norm LIKE ? GROUP BY title_norm, source",
+        (pattern,), db_path
+    )
+    titles = {}
+    for row in rows:
+        row["started"] = period_start(row["last_period"])
+        entry = titles.get(row["title_norm"])
+        if entry is None:
+            titles[row["title_norm"]] = entry = {"latest": row, "best_rank": row["best_rank"], "sources": []}
+        elif row["started"] > entry["latest"]["started"]:
+            entry["latest"] = row
+        entry["best_rank"] = min(entry["best_rank"], row["best_rank"])
+        entry["sources"].append(row["source"])
+
+    entries = sorted(titles.values(), key=lambda entry: entry["best_rank"])
+    entries.sort(key=lambda entry: entry["latest"]["started"], reverse=True)
+    return [{
+        "title": entry["latest"]["title"],
+        "isbn": entry["latest"]["isbn"],
+        "last_period": entry["latest"]["last_period"],
+        "best_rank": entry["best_rank"],
+        "sources": ','.join(sorted(entry["sources"]))
+    } for entry in entries[:limit]]
+
+if __name__ == "__main__":
+    # python ranking_store.py isbn 978-4-575-24810-4
+    # python ranking_store.py title 成瀬は都を駆け抜ける
+    if len(sys.argv) < 3 or sys.argv[1] not in ("isbn", "title"):
+        print("Usage: python ranking_store.py isbn|title <value>")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    if sys.argv[1] == "isbn":
+        results = isbn_history(sys.argv[2])
+    else:
+        results = title_history(sys.argv[2])
+    elapsed = (time.perf_counter() - start) * 1000
+
+    for row in results:
+        print(f"{row['period']}  {row['source']:<7} {row['genre']:<20} #{row['rank']:<3} {row['title']}")
+    print(f"\n{len(results)} rows in {elapsed:.1f} ms")
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+import json
+import os
+
+JS_PREFIX = 'const oricon_data = '
+
+# Text fields shown as '-' when missing (the dashboard's convention)
+TEXT_FIELDS = ("title", "author", "publisher")
+
+def parse_int(value):
+    """'1,600' / '1800円' / 3 -> int; '-', '' and None -> None"""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    digits = ''.join(ch for ch in str(value) if ch.isdigit())
+    return int(digits) if digits else None
+
+def clean_text(value):
+    value = ' '.join(str(value).split()) if value is not None else ''
+    return value if value and value != '-' else None
+
+class BookRecord:
+    """One chart row, shared by every scraper and writer.
+
+    Numbers are ints (rank, price in yen, sales, last_week) and missing
+    values are None; as_dict() turns them back into the published shape.
+    """
+
+    __slots__ = (
+        "rank", "title", "author", "publisher", "price", "isbn",
+        "sales", "last_week", "image", "title_en", "author_en", "publisher_en",
+        "last_rank", "movement", "peak_rank", "periods_on_chart"
+    )
+
+    def __init__(self, rank, title, author=None, publisher=None, price=None, isbn=None,
+                 sales=None, last_week=None, image=None, title_en=None, author_en=None, publisher_en=None,
+                 last_rank=None, movement=None, peak_rank=None, periods_on_chart=None):
+        self.rank = parse_int(rank)
+        self.title = clean_text(title)
+        self.author = clean_text(author)
+        self.publisher = clean_text(publisher)
+        self.price = parse_int(price)
+        self.isbn = clean_text(isbn)
+        self.sales = parse_int(sales)
+        self.last_week = parse_int(last_week)
+        self.image = image or None
+        self.title_en = title_en
+        self.author_en = author_en
+        self.publisher_en = publisher_en
+        # Filled from the ranking history by chart_movement.annotate_chart
+        self.last_rank = parse_int(last_rank)
+        self.movement = movement
+        self.peak_rank = parse_int(peak_rank)
+        self.periods_on_chart = parse_int(periods_on_chart)
+
+    @classmethod
+    def from_dict(cls, book):
+        """Build a record from any of the legacy per-scraper dict shapes"""
+        return cls(**{field: book.get(field) for field in cls.__slots__})
+
+    def get(self, field, default=None):
+        """dict-style access, so code written for plain dicts keeps working"""
+        value = getattr(self, field, None)
+        if value is None and field in TEXT_FIELDS:
+            return '-'
+        return default if value is None else value
+
+    def as_dict(self):
+        book = {"rank": self.rank}
+        for field in TEXT_FIELDS:
+            book[field] = getattr(self, field) or '-'
+        for field in self.__slots__[4:]:
+            value = getattr(self, field)
+            if value is not None:
+                book[field] = value
+        return book
+
+    def __repr__(self):
+        return f"BookRecord({self.rank}, {self.title!r})"
+
+class Chart:
+    """A scraped chart: genre -> ordered list of BookRecord"""
+
+    __slots__ = ("source", "updated", "genres", "meta")
+
+    def __init__(self, source, updated=None, genres=None, meta=None):
+        self.source = source
+        self.updated = updated
+        self.genres = genres if genres is not None else {}
+        self.meta = meta or {}
+
+    @classmethod
+    def from_dict(cls, data, source):
+        meta = {k: v for k, v in data.items() if k not in ("updated", "source", "genres")}
+        genres = {
+            genre: [book if isinstance(book, BookRecord) else BookRecord.from_dict(book) for book in books]
+            for genre, books in data.get("genres", {}).items()
+        }
+        return cls(source, data.get("updated"), genres, meta)
+
+    def records(self):
+        """(genre, record) pairs in chart order"""
+        for genre, books in self.genres.items():
+            for book in books:
+                yield genre, book
+
+    def as_dict(self):
+        data = {"updated": self.updated, "source": self.source}
+        data.update(self.meta)
+        data["genres"] = {genre: [book.as_dict() for book in books] for genre, books in self.genres.items()}
+        return data
+
+def dumps(chart, fmt='json'):
+    """Serialize a chart as 'json', 'js' (the data.js global) or 'ndjson' (one row per line)"""
+    if fmt == 'ndjson':
+        lines = []
+        for genre, book in chart.records():
+            row = {"source": chart.source, "genre": genre}
+            row.update(book.as_dict())
+            lines.append(json.dumps(row, ensure_ascii=False, separators=(',', ':')))
+        return '\n'.join(lines) + '\n'
+    text = json.dumps(chart.as_dict(), ensure_ascii=False, separators=(',', ':'))
+    if fmt == 'js':
+        return f"{JS_PREFIX}{text};\n"
+    return text
+
+def write_chart(chart, path):
+    """Write a chart, picking the format from the file extension"""
+    fmt = 'js' if path.endswith('.js') else 'ndjson' if path.endswith('.ndjson') else 'json'
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(dumps(chart, fmt))
+
+def load_chart(path, source=None):
+    """Read data.js or a JSON chart back into a Chart"""
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    if path.endswith('.js'):
+        content = content.replace(JS_PREFIX, '', 1).rstrip().rstrip(';')
+    data = json.loads(content)
+    return Chart.from_dict(data, source or data.get("source") or os.path.splitext(os.path.basename(path))[0])
@@ -1,15 +1,33 @@
-import pytesseract
-import easyocr
-from PIL import Image
 import json
 from datetime import datetime
 import re
 import os
+import glob
+import time
 import difflib
+import metrics
+import profiling
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from ocr_cache import cached_read, default_cache
+from ocr_engines import get_engine, print_pool_stats
+from ocr_preprocess import PRESETS, preprocess, settings_for
+from ocr_table import parse_boxes
+from records import BookRecord, Chart, write_chart
 
-# Configuration
-TESSERACT_PATH = r"C:\Program Files\Tesseract-OCR\tesseract.exe"  # Windows
-# TESSERACT_PATH = "/usr/bin/tesseract"  # Linux/Mac
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp', '.bmp', '.tif', '.tiff')
+
+# Each worker holds its own copy of the models, so keep the pool small
+MAX_WORKERS = 4
+
+# Screenshots handled here are Nippan charts (see ocr_preprocess.SOURCE_PRESETS)
+SOURCE = "nippan"
+
+# Below this many characters an OCR result counts as a failure
+MIN_TEXT_LENGTH = 50
+
+# Race mode: a result scoring this well ends the race without waiting for the other engine
+GOOD_ENOUGH = 0.8
+ROWS_PER_IMAGE = 10
 
 def load_corrections():
     """Load corrections from books_corrections.json"""
@@ -27,38 +45,51 @@ def find_correction(title, corrections_by_genre):
     # Normalize title (remove extra spaces)
     title_normalized = ' '.join(title.split())
     
-    for genre, books in corrections_by_genre.items():
-        for book in books:
-            book_title = book['title']
-            book_title_normalized = ' '.join(book_title.split())
-            
-            # Exact match
-            if title_normalized.lower() == book_title_normalized.lower():
-                return book
-            
-            # Fuzzy match (85% similarity)
-            similarity = difflib.SequenceMatcher(None, title_normalized.lower(), book_title_normalized.lower()).ratio()
-            if similarity > 0.85:
-                print(f"   🔗 Fuzzy matched: {title_normalized} ≈ {book_title_normalized} ({similarity*100:.0f}%)")
-                return book
+    # Counted once per lookup: a metrics call per comparison shows up in profiles
+    comparisons = 0
+    try:
+        for genre, books in corrections_by_genre.items():
+            for book in books:
+                book_title = book['title']
+                book_title_normalized = ' '.join(book_title.split())
+                
+                # Exact match
+                if title_normalized.lower() == book_title_normalized.lower():
+                    return book
+                
+                # Fuzzy match (85% similarity)
+                comparisons += 1
+                similarity = difflib.SequenceMatcher(None, title_normalized.lower(), book_title_normalized.lower()).ratio()
+                if similarity > 0.85:
+                    print(f"   🔗 Fuzzy matched: {title_normalized} ≈ {book_title_normalized} ({similarity*100:.0f}%)")
+                    return book
+    finally:
+        metrics.inc("fuzzy_comparisons", comparisons)
     
     return None
 
-def extract_with_tesseract(image_path):
-    """Extract text using Tesseract OCR"""
+def ocr_result(engine_name, image_path, use_cache=True, settings=None):
+    """OCRResult from the shared engine, through the OCR cache unless disabled.
+
+    settings are ocr_preprocess settings, the source's preset by default.
+    """
+    settings = settings_for(SOURCE) if settings is None else settings
+    engine = get_engine(engine_name)
+    prepare = (lambda path: preprocess(path, settings)) if settings else None
+    if use_cache:
+        return cached_read(engine, image_path, settings, prepare)
+    return engine.read(prepare(image_path) if prepare else image_path)
+
+def extract_with_tesseract(image_path, use_cache=True, settings=None):
+    """Extract text (and boxes) using Tesseract OCR"""
     try:
         print("   📄 Trying Tesseract OCR...")
         
-        # Set Tesseract path if on Windows
-        if os.name == 'nt':
-            pytesseract.pytesseract.pytesseract_cmd = TESSERACT_PATH
+        result = ocr_result("tesseract", image_path, use_cache, settings)
         
-        image = Image.open(image_path)
-        text = pytesseract.image_to_string(image, lang='jpn+eng')
-        
-        if len(text.strip()) > 50:
+        if len(result.text.strip()) > MIN_TEXT_LENGTH:
             print("   ✅ Tesseract successful!")
-            return text
+            return result
         else:
             print("   ⚠️  Tesseract returned too little text")
             return None
@@ -67,29 +98,17 @@ def extract_with_tesseract(image_path):
         print(f"   ⚠️  Tesseract error: {e}")
         return None
 
-def extract_with_easyocr(image_path):
-    """Extract text using EasyOCR"""
+def extract_with_easyocr(image_path, use_cache=True, settings=None):
+    """Extract text (and boxes) using EasyOCR"""
     try:
         print("   📄 Trying EasyOCR...")
         
-        reader = easyocr.Reader(['ja', 'en'], gpu=False)
-        results = reader.readtext(image_path)
-        
-        # Extract text with confidence scores
-        text_lines = []
-        for item in results:
-            if len(item) >= 2:
-                text = item[1]
-                confidence = item[2] if len(item) > 2 else 0
-                
-                if confidence > 0.3:  # Only keep if 30%+ confidence
-                    text_lines.append(text)
-        
-        text = '\n'.join(text_lines)
+        # The shared engine loads the models on first use only
+        result = ocr_result("easyocr", image_path, use_cache, settings)
         
-        if len(text.strip()) > 50:
+        if len(result.text.strip()) > MIN_TEXT_LENGTH:
             print("   ✅ EasyOCR successful!")
-            return text
+            return result
         else:
             print("   ⚠️  EasyOCR returned too little text")
             return None
@@ -98,8 +117,68 @@ def extract_with_easyocr(image_path):
         print(f"   ⚠️  EasyOCR error: {e}")
         return None
 
-def extract_text_from_image(image_path):
-    """Extract text from image - try Tesseract first, fallback to EasyOCR"""
+def score_result(result):
+    """0-1: half mean line confidence, half parse success (rows parsed out of ROWS_PER_IMAGE)"""
+    if result is None or len(result.text.strip()) <= MIN_TEXT_LENGTH:
+        return 0.0
+    rows = len(parse_ocr_result(result, quiet=True))
+    return 0.5 * result.mean_confidence() + 0.5 * min(rows / ROWS_PER_IMAGE, 1.0)
+
+def race_engines(image_path, use_cache=True, settings=None):
+    """Run Tesseract and EasyOCR concurrently and keep the better-scoring result.
+
+    A result scoring GOOD_ENOUGH returns at once. The other engine cannot
+    be interrupted: it runs to completion in the background, holding its
+    engine (the next image using that engine waits for it), and the process
+    waits for it at exit. Racing saves the sequential fallback's wait when
+    Tesseract fails, not the slower engine's run time.
+    """
+    print("   🏁 Racing Tesseract and EasyOCR...")
+    start = time.perf_counter()
+    pool = ThreadPoolExecutor(max_workers=2)
+    futures = {
+        pool.submit(profiling.bind(ocr_result), name, image_path, use_cache, settings): name
+        for name in ("tesseract", "easyocr")
+    }
+    finished = {}
+    best_name, best_result, best_score = None, None, 0.0
+    try:
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"   ⚠️  {name} error: {e}")
+                result = None
+            score = score_result(result)
+            finished[name] = (time.perf_counter() - start, score)
+            print(f"   ⏱️  {name}: score {score:.2f} after {finished[name][0]:.1f}s")
+            if score > best_score:
+                best_name, best_result, best_score = name, result, score
+            if score >= GOOD_ENOUGH:
+                break
+    finally:
+        # A running engine can't be interrupted; the pool's thread finishes it unobserved
+        pool.shutdown(wait=False, cancel_futures=True)
+    elapsed = time.perf_counter() - start
+
+    running = [name for name in futures.values() if name not in finished]
+    if running:
+        print(f"   ✂️  Kept {best_name} after {elapsed:.1f}s ({running[0]} still running in the background)")
+    elif "tesseract" in finished:
+        # Sequential mode waits for Tesseract, then for EasyOCR when Tesseract failed
+        tesseract_seconds, tesseract_score = finished["tesseract"]
+        sequential = tesseract_seconds + (finished["easyocr"][0] if tesseract_score == 0 else 0)
+        print(f"   💨 Kept {best_name} after {elapsed:.1f}s "
+              f"(sequential fallback: {sequential:.1f}s, saved {sequential - elapsed:.1f}s)")
+
+    return best_result
+
+def extract_from_image(image_path, engine="auto", use_cache=True, settings=None):
+    """OCR an image - try Tesseract first, fallback to EasyOCR. Returns an OCRResult or None.
+
+    engine="tesseract" or "easyocr" runs that engine only; "race" runs both at once.
+    """
     
     if not os.path.exists(image_path):
         print(f"❌ Image not found: {image_path}")
@@ -107,26 +186,39 @@ def extract_text_from_image(image_path):
     
     print(f"\n🖼️  Processing: {image_path}")
     
-    # Try Tesseract first (faster)
-    text = extract_with_tesseract(image_path)
-    
-    # If Tesseract fails, try EasyOCR
-    if not text:
-        text = extract_with_easyocr(image_path)
+    if engine == "race":
+        result = race_engines(image_path, use_cache, settings)
+    elif engine == "tesseract":
+        result = extract_with_tesseract(image_path, use_cache, settings)
+    elif engine == "easyocr":
+        result = extract_with_easyocr(image_path, use_cache, settings)
+    else:
+        # Try Tesseract first (faster)
+        result = extract_with_tesseract(image_path, use_cache, settings)
+        
+        # If Tesseract fails, try EasyOCR
+        if not result:
+            result = extract_with_easyocr(image_path, use_cache, settings)
     
-    if not text:
+    if not result:
         print(f"❌ Could not extract text from image")
         return None
     
-    return text
+    return result
 
-def parse_ranking_table(text):
+def extract_text_from_image(image_path, engine="auto", use_cache=True, settings=None):
+    """Extract text from image (see extract_from_image)"""
+    result = extract_from_image(image_path, engine, use_cache, settings)
+    return result.text if result else None
+
+def parse_ranking_table(text, quiet=False):
     """Parse OCR text into structured ranking data"""
     
     books = []
     lines = text.strip().split('\n')
     
-    print("   📊 Parsing table...")
+    if not quiet:
+        print("   📊 Parsing table...")
     
     for line in lines:
         # Clean up line
@@ -134,13 +226,10 @@ def parse_ranking_table(text):
         if not line or len(line) < 5:
             continue
         
-        # Remove extra spaces
-        line = ' '.join(line.split())
-        
         try:
             # Try to match pattern: "Rank  Title  Author  Publisher"
-            # Split by multiple spaces or tabs
-            parts = re.split(r'\s{2,}|\t', line)
+            # Split by multiple spaces or tabs, then remove extra spaces inside each cell
+            parts = [' '.join(part.split()) for part in re.split(r'\s{2,}|\t', line)]
             
             if len(parts) >= 3:
                 rank_str = parts[0].strip()
@@ -177,112 +266,199 @@ def parse_ranking_table(text):
         except Exception as e:
             continue
     
-    print(f"   ✅ Parsed {len(books)} books")
+    if not quiet:
+        print(f"   ✅ Parsed {len(books)} books")
+    return books
+
+def parse_ocr_result(result, quiet=False):
+    """Books from an OCRResult: rebuilt from the line boxes, else parsed from the text"""
+    books = parse_boxes(result.lines) if result.lines else []
+    if not books:
+        books = parse_ranking_table(result.text, quiet)
     return books
 
-def scrape_from_image(image_path):
-    """Main function: extract data from image and save to JSON"""
+def image_paths(target):
+    """A file, a directory (every image inside) or a glob, in sorted order"""
+    if os.path.isdir(target):
+        paths = [os.path.join(target, name) for name in os.listdir(target)
+                 if name.lower().endswith(IMAGE_EXTENSIONS)]
+    elif glob.has_magic(target):
+        paths = [path for path in glob.glob(target) if path.lower().endswith(IMAGE_EXTENSIONS)]
+    else:
+        paths = [target]
+    return sorted(paths)
+
+def _init_worker(engine):
+    # One torch thread per process: the pool provides the parallelism
+    os.environ.setdefault("OMP_NUM_THREADS", "1")
+    # Warm the engines once per worker, not once per image
+    names = {"auto": ["tesseract"], "race": ["tesseract", "easyocr"]}.get(engine, [engine])
+    for name in names:
+        get_engine(name).load()
+
+def _ocr_worker(image_path, engine, use_cache=True, settings=None):
+    start = time.perf_counter()
+    result = extract_from_image(image_path, engine, use_cache, settings)
+    return result, time.perf_counter() - start
+
+def ocr_images(paths, engine="auto", workers=None, use_cache=True, settings=None):
+    """OCRResult (or None) for each path, in the order given.
+
+    Several images run across a process pool with one warm engine per worker.
+    """
+    start = time.perf_counter()
+    workers = max(1, min(workers or MAX_WORKERS, len(paths), os.cpu_count() or 1))
+    if len(paths) == 1 or workers == 1:
+        results = [_ocr_worker(path, engine, use_cache, settings) for path in paths]
+    else:
+        print(f"🧵 OCR of {len(paths)} images across {workers} worker processes ({engine})")
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(engine,)) as pool:
+            # map() yields in submission order, so the merge below is deterministic
+            count = len(paths)
+            results = list(pool.map(_ocr_worker, paths, [engine] * count, [use_cache] * count, [settings] * count))
+    elapsed = time.perf_counter() - start
+
+    ocr_seconds = sum(seconds for _, seconds in results)
+    print(f"\n⏱️  {len(paths)} image(s) in {elapsed:.1f}s - {len(paths) / elapsed:.2f} images/s "
+          f"({ocr_seconds:.1f}s of OCR across {workers} worker(s))")
+    if workers == 1:
+        print_pool_stats()
+        if use_cache:
+            cache = default_cache()
+            print(f"🗃️  OCR cache: {cache.hits} hit(s), {cache.misses} miss(es)")
+    return [result for result, _ in results]
+
+def build_chart(extracted_books, corrections, images):
+    """Match parsed books against the corrections and split them into genres"""
+    data = Chart("nippan", datetime.now().isoformat() + "Z", {
+        "General": [],
+        "Paperback": [],
+        "Comics": []
+    }, meta={"image": images[0] if len(images) == 1 else images})
     
-    try:
-        # Load corrections
-        corrections = load_corrections()
-        print(f"📋 Loaded corrections: {len(corrections)} genres")
-        
-        # Extract text from image
-        text = extract_text_from_image(image_path)
+    general_count = 0
+    paperback_count = 0
+    comics_count = 0
+    
+    print(f"\n🔍 Matching with corrections...\n")
+    
+    for book in extracted_books:
+        rank = book['rank']
+        title = book['title']
         
-        if not text:
-            print("❌ Failed to extract text from image")
-            return
+        print(f"📖 {rank}. {title}")
         
-        print("\n📝 Extracted text:")
-        print("=" * 50)
-        print(text[:500])  # Print first 500 chars
-        print("=" * 50)
+        # Try to find correction
+        correction = find_correction(title, corrections)
         
-        # Parse into table
-        extracted_books = parse_ranking_table(text)
+        if correction:
+            author = correction.get('author', '-')
+            publisher = correction.get('publisher', '-')
+            print(f"   ✅ Correction found!")
+        else:
+            author = book['author']
+            publisher = book['publisher']
+            print(f"   ℹ️  Using extracted data")
         
-        # Create output structure
-        data = {
-            "updated": datetime.now().isoformat() + "Z",
-            "source": f"image: {image_path}",
-            "genres": {
-                "General": [],
-                "Paperback": [],
-                "Comics": []
-            }
-        }
+        print(f"   Author: {author}")
+        print(f"   Publisher: {publisher}\n")
         
-        general_count = 0
-        paperback_count = 0
-        comics_count = 0
+        book_data = BookRecord(rank, title, author, publisher)
         
-        print(f"\n🔍 Matching with corrections...\n")
+        # Distribute to genres
+        if general_count < 10:
+            data.genres["General"].append(book_data)
+            general_count += 1
+        elif paperback_count < 10:
+            data.genres["Paperback"].append(book_data)
+            paperback_count += 1
+        elif comics_count < 10:
+            data.genres["Comics"].append(book_data)
+            comics_count += 1
+    
+    return data
+
+@profiling.entry_point
+def scrape_from_images(paths, engine="auto", workers=None, use_cache=True, settings=None):
+    """Main function: extract data from one or more images and save to JSON.
+
+    Books are merged in path order, each image's rows in the order they were read.
+    """
+    
+    try:
+        # Load corrections
+        corrections = load_corrections()
+        print(f"📋 Loaded corrections: {len(corrections)} genres")
         
-        for book in extracted_books:
-            rank = book['rank']
-            title = book['title']
-            
-            print(f"📖 {rank}. {title}")
-            
-            # Try to find correction
-            correction = find_correction(title, corrections)
-            
-            if correction:
-                author = correction.get('author', '-')
-                publisher = correction.get('publisher', '-')
-                print(f"   ✅ Correction found!")
-            else:
-                author = book['author']
-                publisher = book['publisher']
-                print(f"   ℹ️  Using extracted data")
+        # Extract text from the images
+        with profiling.stage("image.ocr"):
+            results = ocr_images(paths, engine, workers, use_cache, settings)
+        extracted_books = []
+        for image_path, result in zip(paths, results):
+            if not result:
+                print(f"❌ Failed to extract text from {image_path}")
+                continue
             
-            print(f"   Author: {author}")
-            print(f"   Publisher: {publisher}\n")
+            if len(paths) == 1:
+                print("\n📝 Extracted text:")
+                print("=" * 50)
+                print(result.text[:500])  # Print first 500 chars
+                print("=" * 50)
             
-            book_data = {
-                "rank": rank,
-                "last_week": "-",
-                "title": title,
-                "author": author,
-                "publisher": publisher,
-                "image": ""
-            }
-            
-            # Distribute to genres
-            if general_count < 10:
-                data["genres"]["General"].append(book_data)
-                general_count += 1
-            elif paperback_count < 10:
-                data["genres"]["Paperback"].append(book_data)
-                paperback_count += 1
-            elif comics_count < 10:
-                data["genres"]["Comics"].append(book_data)
-                comics_count += 1
+            # Rebuild the table from the boxes (or the text)
+            with profiling.stage("image.parse"):
+                extracted_books.extend(parse_ocr_result(result))
+        
+        if not any(results):
+            print("❌ Failed to extract text from image")
+            return
         
-        # Save to file
-        with open('nippan_books.json', 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        with profiling.stage("image.correct"):
+            data = build_chart(extracted_books, corrections, paths)
+            
+            # Save to file
+            write_chart(data, 'nippan_books.json')
         
         print(f"\n✅ Scraping completed!")
-        print(f"📚 General: {len(data['genres']['General'])} books")
-        print(f"📚 Paperback: {len(data['genres']['Paperback'])} books")
-        print(f"📚 Comics: {len(data['genres']['Comics'])} books")
+        print(f"📚 General: {len(data.genres['General'])} books")
+        print(f"📚 Paperback: {len(data.genres['Paperback'])} books")
+        print(f"📚 Comics: {len(data.genres['Comics'])} books")
         print(f"💾 Saved to: nippan_books.json")
+        return data
         
     except Exception as e:
         print(f"❌ Error: {e}")
         import traceback
         traceback.print_exc()
 
+def scrape_from_image(image_path, engine="auto", use_cache=True, profile=False):
+    """Extract data from a single image and save to JSON"""
+    return scrape_from_images([image_path], engine, workers=1, use_cache=use_cache, profile=profile)
+
 if __name__ == "__main__":
-    import sys
+    import argparse
     
-    if len(sys.argv) > 1:
-        image_path = sys.argv[1]
-    else:
-        # Default: look for screenshot.png in current directory
-        image_path = "screenshot.png"
+    # python scrape_from_image.py screenshot.png
+    # python scrape_from_image.py screenshots/ --engine easyocr --workers 4
+    # python scrape_from_image.py "screenshots/*.png"
+    parser = argparse.ArgumentParser(description="Extract a ranking table from chart screenshots")
+    # Default: look for screenshot.png in current directory
+    parser.add_argument("target", nargs="?", default="screenshot.png", help="image file, directory or glob")
+    parser.add_argument("--engine", choices=("auto", "race", "tesseract", "easyocr"), default="auto",
+                        help="auto tries Tesseract first and falls back to EasyOCR; race runs both at once")
+    parser.add_argument("--workers", type=int, help=f"OCR processes (default: up to {MAX_WORKERS})")
+    parser.add_argument("--no-cache", action="store_true", help="always re-run OCR (see ocr_cache.py)")
+    parser.add_argument("--preset", choices=sorted(PRESETS),
+                        help=f"image preprocessing (default: the {SOURCE} preset in ocr_preprocess.py)")
+    parser.add_argument("--profile", action="store_true",
+                        help="cProfile / tracemalloc reports in reports/profile (OCR runs in-process)")
+    args = parser.parse_args()
     
-    scrape_from_image(image_path)
+    paths = image_paths(args.target)
+    if not paths:
+        print(f"❌ No images found in {args.target}")
+    else:
+        settings = dict(PRESETS[args.preset]) if args.preset else None
+        # Worker processes are not profiled: keep the OCR in this one
+        workers = 1 if args.profile else args.workers
+        scrape_from_images(paths, args.engine, workers, not args.no_cache, settings, profile=args.profile)
@@ -1,8 +1,13 @@
-import requests
 from bs4 import BeautifulSoup
 import json
+import sys
 from datetime import datetime
 import difflib
+import metrics
+import profiling
+from chart_movement import record_history
+from ranking_store import week_period
+from records import BookRecord, Chart, clean_text, write_chart
 
 def load_corrections():
     """Load corrections from books_corrections.json"""
@@ -20,22 +25,135 @@ def find_correction(title, corrections_by_genre):
     # Normalize title (remove extra spaces)
     title_normalized = ' '.join(title.split())
     
-    for genre, books in corrections_by_genre.items():
-        for book in books:
-            book_title = book['title']
-            book_title_normalized = ' '.join(book_title.split())
+    # Counted once per lookup: a metrics call per comparison shows up in profiles
+    comparisons = 0
+    try:
+        for genre, books in corrections_by_genre.items():
+            for book in books:
+                book_title = book['title']
+                book_title_normalized = ' '.join(book_title.split())
+                
+                # Exact match
+                if title_normalized.lower() == book_title_normalized.lower():
+                    return book
+                
+                # Fuzzy match (90% similarity)
+                comparisons += 1
+                similarity = difflib.SequenceMatcher(None, title_normalized.lower(), book_title_normalized.lower()).ratio()
+                if similarity > 0.9:
+                    return book
+    finally:
+        metrics.inc("fuzzy_comparisons", comparisons)
+    
+    return None
+
+NIPPAN_URL = "https://www.nippan.co.jp/rank/books/"
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+def fetch_nippan(url=NIPPAN_URL):
+    """The ranking page HTML, or None"""
+    print("🔄 Fetching titles from Nippan...\n")
+    response = metrics.http_get(url, headers=HEADERS, timeout=10)
+    response.encoding = 'utf-8'
+    
+    if response.status_code != 200:
+        print(f"❌ Failed to fetch Nippan")
+        return None
+    return response.text
+
+def parse_nippan(html):
+    """Chart of ranks and titles; authors and publishers come from the corrections"""
+    soup = BeautifulSoup(html, 'html.parser')
+    
+    data = Chart("nippan", datetime.now().isoformat() + "Z", {
+        "General": [],
+        "Paperback": [],
+        "Comics": []
+    })
+    
+    rows = soup.find_all('tr')
+    
+    general_count = 0
+    paperback_count = 0
+    comics_count = 0
+    
+    for row in rows:
+        try:
+            cells = row.find_all('td')
+            if len(cells) < 2:
+                continue
+            
+            rank_text = cells[0].get_text(strip=True)
+            if not rank_text.isdigit():
+                continue
+            rank = int(rank_text)
+            
+            # Get title (cells[1])
+            title_link = cells[1].find('a')
+            if not title_link:
+                continue
+            
+            title = title_link.get_text(strip=True)
             
-            # Exact match
-            if title_normalized.lower() == book_title_normalized.lower():
-                return book
+            # IGNORE price column (cells[2] - 価格/円)
+            # Get last_week from cells[3] (前週順位)
+            last_week = cells[3].get_text(strip=True) if len(cells) > 3 else "-"
             
-            # Fuzzy match (90% similarity)
-            similarity = difflib.SequenceMatcher(None, title_normalized.lower(), book_title_normalized.lower()).ratio()
-            if similarity > 0.9:
-                return book
+            print(f"📖 {rank}. {title}")
+            
+            book_data = BookRecord(rank, title, "-", "-", last_week=last_week)
+            
+            if general_count < 10:
+                data.genres["General"].append(book_data)
+                general_count += 1
+            elif paperback_count < 10:
+                data.genres["Paperback"].append(book_data)
+                paperback_count += 1
+            elif comics_count < 10:
+                data.genres["Comics"].append(book_data)
+                comics_count += 1
+            
+        except Exception as e:
+            print(f"   ❌ Error: {e}\n")
+            continue
     
-    return None
+    metrics.inc("rows_extracted", sum(len(books) for books in data.genres.values()))
+    return data
+
+def apply_corrections(data, corrections):
+    """Fill author and publisher from books_corrections.json"""
+    print()
+    for _, book in data.records():
+        correction = find_correction(book.title, corrections)
+        
+        if correction:
+            book.author = clean_text(correction.get('author'))
+            book.publisher = clean_text(correction.get('publisher'))
+            print(f"   ✅ Found in corrections: {book.get('title')}")
+            print(f"   Author: {book.get('author')}")
+            print(f"   Publisher: {book.get('publisher')}")
+        else:
+            print(f"   ⚠️  No correction found: {book.get('title')}")
+    return data
 
+def save_nippan(data):
+    """Record the chart in the ranking history and write nippan_books.json"""
+    try:
+        record_history(data, week_period())
+    except Exception as e:
+        print(f"⚠️  Could not store ranking history: {e}")
+    
+    write_chart(data, 'nippan_books.json')
+    
+    print(f"\n✅ Scraping completed!")
+    print(f"📚 General: {len(data.genres['General'])} books")
+    print(f"📚 Paperback: {len(data.genres['Paperback'])} books")
+    print(f"📚 Comics: {len(data.genres['Comics'])} books")
+
+@profiling.entry_point
 def scrape_nippan_books():
     """Scrape from Nippan, use corrections from books_corrections.json"""
     
@@ -44,110 +162,22 @@ def scrape_nippan_books():
         corrections = load_corrections()
         print(f"📋 Loaded corrections: {len(corrections)} genres\n")
         
-        url = "https://www.nippan.co.jp/rank/books/"
-        
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        
-        print("🔄 Fetching titles from Nippan...\n")
-        response = requests.get(url, headers=headers, timeout=10)
-        response.encoding = 'utf-8'
-        
-        if response.status_code != 200:
-            print(f"❌ Failed to fetch Nippan")
+        with profiling.stage("nippan.fetch"):
+            html = fetch_nippan()
+        if not html:
             return
         
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        data = {
-            "updated": datetime.now().isoformat() + "Z",
-            "genres": {
-                "General": [],
-                "Paperback": [],
-                "Comics": []
-            }
-        }
-        
-        rows = soup.find_all('tr')
-        
-        general_count = 0
-        paperback_count = 0
-        comics_count = 0
-        
-        for row in rows:
-            try:
-                cells = row.find_all('td')
-                if len(cells) < 2:
-                    continue
-                
-                rank_text = cells[0].get_text(strip=True)
-                if not rank_text.isdigit():
-                    continue
-                rank = int(rank_text)
-                
-                # Get title (cells[1])
-                title_link = cells[1].find('a')
-                if not title_link:
-                    continue
-                
-                title = title_link.get_text(strip=True)
-                
-                # IGNORE price column (cells[2] - 価格/円)
-                # Get last_week from cells[3] (前週順位)
-                last_week = cells[3].get_text(strip=True) if len(cells) > 3 else "-"
-                
-                print(f"📖 {rank}. {title}")
-                
-                # Try to find correction for this title
-                correction = find_correction(title, corrections)
-                
-                if correction:
-                    author = correction.get('author', '-')
-                    publisher = correction.get('publisher', '-')
-                    print(f"   ✅ Found in corrections!")
-                    print(f"   Author: {author}")
-                    print(f"   Publisher: {publisher}")
-                else:
-                    author = "-"
-                    publisher = "-"
-                    print(f"   ⚠️  No correction found")
-                
-                book_data = {
-                    "rank": rank,
-                    "last_week": last_week,
-                    "title": title,
-                    "author": author,
-                    "publisher": publisher,
-                    "image": ""
-                }
-                
-                if general_count < 10:
-                    data["genres"]["General"].append(book_data)
-                    general_count += 1
-                elif paperback_count < 10:
-                    data["genres"]["Paperback"].append(book_data)
-                    paperback_count += 1
-                elif comics_count < 10:
-                    data["genres"]["Comics"].append(book_data)
-                    comics_count += 1
-                
-                print()
-                
-            except Exception as e:
-                print(f"   ❌ Error: {e}\n")
-                continue
-        
-        with open('nippan_books.json', 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        with profiling.stage("nippan.parse"):
+            data = parse_nippan(html)
+        with profiling.stage("nippan.correct"):
+            apply_corrections(data, corrections)
+            save_nippan(data)
         
-        print(f"\n✅ Scraping completed!")
-        print(f"📚 General: {len(data['genres']['General'])} books")
-        print(f"📚 Paperback: {len(data['genres']['Paperback'])} books")
-        print(f"📚 Comics: {len(data['genres']['Comics'])} books")
+        return data
         
     except Exception as e:
         print(f"❌ Error: {e}")
 
 if __name__ == "__main__":
-    scrape_nippan_books()
+    # python scrape_nippan.py [--profile]
+    scrape_nippan_books(profile="--profile" in sys.argv[1:])
@@ -1,9 +1,16 @@
-import requests
 from bs4 import BeautifulSoup
 import json
 from datetime import datetime
 import difflib
+import os
+import re
+import sys
 import time
+import metrics
+import profiling
+from chart_movement import record_history
+from ranking_store import week_period
+from records import BookRecord, Chart, write_chart
 
 ORICON_URLS = {
     "Comics": "https://www.oricon.co.jp/rank/obc/w/2026-02-16/",
@@ -28,132 +35,364 @@ def find_correction(title, corrections_by_genre):
     
     title_normalized = ' '.join(title.split())
     
-    for genre, books in corrections_by_genre.items():
-        for book in books:
-            book_title = ' '.join(book['title'].split())
+    # Counted once per lookup: a metrics call per comparison shows up in profiles
+    comparisons = 0
+    try:
+        for genre, books in corrections_by_genre.items():
+            for book in books:
+                book_title = ' '.join(book['title'].split())
+                
+                if title_normalized.lower() == book_title.lower():
+                    return book
+                
+                comparisons += 1
+                similarity = difflib.SequenceMatcher(None, title_normalized.lower(), book_title.lower()).ratio()
+                if similarity > 0.85:
+                    return book
+    finally:
+        metrics.inc("fuzzy_comparisons", comparisons)
+    
+    return None
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+TOP_N = 10
+
+# Fewer structured rows than this means the page changed shape: try OCR instead
+MIN_STRUCTURED_BOOKS = 5
+
+SCREENSHOT_DIR = os.path.join('screenshots', 'oricon')
+
+# Key names seen in ranking JSON (JSON-LD, Next.js / Nuxt state, inline JS)
+RANK_KEYS = ("rank", "position", "rankNo", "ranking")
+TITLE_KEYS = ("title", "name", "itemName", "productName")
+AUTHOR_KEYS = ("author", "artist", "artistName", "writer")
+PUBLISHER_KEYS = ("publisher", "publisherName", "maker", "label")
+SALES_KEYS = ("sales", "salesCount", "estimatedSales", "point")
+
+def fetch_page(url, genre):
+    response = metrics.http_get(url, headers=HEADERS, timeout=10)
+    response.encoding = 'utf-8'
+    
+    if response.status_code != 200:
+        print(f"❌ Failed to fetch {genre}: {response.status_code}")
+        return None
+    return response.text
+
+def find_first(item, tags, class_):
+    for tag in tags:
+        elem = item.find(tag, class_=class_)
+        if elem:
+            return elem
+    return None
+
+def parse_ranking_items(soup):
+    """Books from the HTML ranking items"""
+    books = []
+    rank = 1
+    
+    # Chercher la table de classement Oricon
+    # Oricon utilise une structure spécifique
+    
+    # Méthode 1: Chercher les rows de classement
+    ranking_items = soup.find_all('div', class_='ranking-item')
+    
+    if not ranking_items:
+        # Méthode 2: Chercher les lignes du tableau
+        ranking_items = soup.find_all('tr', class_='js-ranking-item')
+    
+    if not ranking_items:
+        # Méthode 3: Structure générale Oricon
+        ranking_items = soup.select('.ranking-item, .rankingItem, [data-rank]')
+    
+    for item in ranking_items[:TOP_N]:
+        try:
+            title_elem = find_first(item, ('a', 'p', 'span'), 'title')
+            if not title_elem:
+                continue
+            
+            title = title_elem.get_text(strip=True)
+            
+            # Auteur
+            author_elem = find_first(item, ('span', 'a', 'p'), 'artist')
+            author = author_elem.get_text(strip=True) if author_elem else "-"
+            
+            # Éditeur
+            publisher_elem = find_first(item, ('span', 'p', 'td'), 'publisher')
+            publisher = publisher_elem.get_text(strip=True) if publisher_elem else "-"
+            
+            # Ventes estimées
+            sales_elem = find_first(item, ('span', 'p', 'td'), 'sales')
+            sales = sales_elem.get_text(strip=True) if sales_elem else "-"
+            
+            # Rang (si pas déjà incrémenté)
+            rank_elem = item.find('span', class_='rank')
+            if rank_elem:
+                try:
+                    rank = int(rank_elem.get_text(strip=True))
+                except ValueError:
+                    pass
+            
+            books.append(BookRecord(rank, title, author, publisher, sales=sales))
             
-            if title_normalized.lower() == book_title.lower():
-                return book
+            rank += 1
             
-            similarity = difflib.SequenceMatcher(None, title_normalized.lower(), book_title.lower()).ratio()
-            if similarity > 0.85:
-                return book
+        except Exception as e:
+            print(f"   ⚠️  Error parsing item: {e}")
+            continue
     
+    return books
+
+def json_value(value):
+    """Plain text from a JSON field: a string, a number, {"name": ...} or a list of those"""
+    if isinstance(value, dict):
+        return json_value(value.get("name"))
+    if isinstance(value, list):
+        return ', '.join(filter(None, (json_value(item) for item in value))) or None
+    if isinstance(value, (str, int, float)) and not isinstance(value, bool):
+        return str(value).strip() or None
+    return None
+
+def pick(entry, keys):
+    for key in keys:
+        value = json_value(entry.get(key))
+        if value:
+            return value
     return None
 
-def scrape_oricon(url, genre):
-    """Scrape Oricon ranking page"""
+def json_book(entry, position=None):
+    """BookRecord from one ranking entry; None unless it has a title"""
+    item = entry.get("item") if isinstance(entry.get("item"), dict) else {}
+    title = pick(entry, TITLE_KEYS) or pick(item, TITLE_KEYS)
+    if not title:
+        return None
+    return BookRecord(
+        pick(entry, RANK_KEYS) or position,
+        title,
+        pick(entry, AUTHOR_KEYS) or pick(item, AUTHOR_KEYS),
+        pick(entry, PUBLISHER_KEYS) or pick(item, PUBLISHER_KEYS),
+        sales=pick(entry, SALES_KEYS) or pick(item, SALES_KEYS)
+    )
+
+def ranking_lists(data):
+    """Every list of objects in a JSON document that looks like a ranking (ranked, titled entries)"""
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            stack.extend(node.values())
+        elif isinstance(node, list):
+            entries = [entry for entry in node if isinstance(entry, dict)]
+            if entries and len(entries) == len(node) and all(
+                any(key in entry for key in RANK_KEYS) and
+                (any(key in entry for key in TITLE_KEYS) or isinstance(entry.get("item"), dict))
+                for entry in entries
+            ):
+                yield entries
+            stack.extend(node)
+
+def books_from_json(data):
+    """Books from the longest ranking-like list in data"""
+    best = max(ranking_lists(data), key=len, default=[])
+    books = [json_book(entry, position) for position, entry in enumerate(best, 1)]
+    books = [book for book in books if book]
+    books.sort(key=lambda book: book.rank or 0)
+    return books[:TOP_N]
+
+def parse_json_ld(soup):
+    """Books from schema.org ItemList markup"""
+    documents = []
+    for script in soup.find_all('script', type='application/ld+json'):
+        try:
+            documents.append(json.loads(script.string or ''))
+        except ValueError:
+            continue
+    return books_from_json(documents)
+
+def parse_embedded_json(soup):
+    """Books from JSON state embedded in the page (__NEXT_DATA__, window.__...__ = {...})"""
+    decoder = json.JSONDecoder()
+    documents = []
+    for script in soup.find_all('script'):
+        if script.get('type') == 'application/ld+json' or script.get('src'):
+            continue
+        source = (script.string or '').strip()
+        if not source:
+            continue
+        if script.get('type') == 'application/json':
+            starts = [0]
+        else:
+            starts = [match.end() for match in re.finditer(r'=\s*(?=[\[{])', source)]
+        for start in starts:
+            try:
+                documents.append(decoder.raw_decode(source, start)[0])
+            except ValueError:
+                continue
+    return books_from_json(documents)
+
+# Tried in order; the first to give a reliable ranking wins
+STRUCTURED_PARSERS = (
+    ("json-ld", parse_json_ld),
+    ("embedded-json", parse_embedded_json),
+    ("html", parse_ranking_items)
+)
+
+def reliable(books):
+    ranks = [book.rank for book in books]
+    return len(books) >= MIN_STRUCTURED_BOOKS and None not in ranks and len(set(ranks)) == len(ranks)
+
+def extract_structured(html):
+    """(books, method, partial) from the page source.
+
+    books is [] and method None when no parser is reliable; partial is then
+    the longest unreliable result, kept for when OCR fails too.
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    partial = []
+    for method, parse in STRUCTURED_PARSERS:
+        books = parse(soup)
+        if reliable(books):
+            return books, method, books
+        if len(books) > len(partial):
+            partial = books
+    return [], None, partial
+
+def capture_screenshot(url, path, width=1280, height=4000):
+    """Full-height screenshot of url in headless Chrome (needs selenium + chromedriver)"""
+    from selenium import webdriver
     
-    print(f"\n🔄 Scraping {genre} from Oricon...")
+    options = webdriver.ChromeOptions()
+    for argument in ('--headless=new', '--no-sandbox', '--disable-gpu', f'--window-size={width},{height}'):
+        options.add_argument(argument)
+    driver = webdriver.Chrome(options=options)
+    try:
+        driver.get(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        driver.save_screenshot(path)
+    finally:
+        driver.quit()
+    return path
+
+def screenshot_path(genre):
+    return os.path.join(SCREENSHOT_DIR, re.sub(r'\W+', '_', genre.lower()) + '.png')
+
+def ocr_fallback(url, genre):
+    """Screenshot the page and OCR it: the slow path, only when structured extraction fails"""
+    path = screenshot_path(genre)
+    try:
+        capture_screenshot(url, path)
+    except Exception as e:
+        print(f"   ⚠️  Could not capture screenshot: {e}")
+        if not os.path.exists(path):
+            return []
+        print(f"   Using existing {path}")
     
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-    }
+    try:
+        # OCR stack (Pillow, Tesseract/EasyOCR) is only needed here
+        from ocr_preprocess import settings_for
+        from scrape_from_image import extract_from_image, parse_ocr_result
+    except ImportError as e:
+        print(f"   ⚠️  OCR unavailable: {e}")
+        return []
     
+    result = extract_from_image(path, settings=settings_for("oricon"))
+    if not result:
+        return []
+    books = parse_ocr_result(result)
+    return [BookRecord(book["rank"], book["title"], book["author"], book["publisher"]) for book in books[:TOP_N]]
+
+def extract_books(html, url, genre, ocr=True):
+    """(books, method) from a fetched page (html may be None): structured data first,
+    OCR of a screenshot as fallback.
+    """
+    partial = []
     try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.encoding = 'utf-8'
-        
-        if response.status_code != 200:
-            print(f"❌ Failed to fetch {genre}: {response.status_code}")
-            return []
-        
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        books = []
-        rank = 1
-        
-        # Chercher la table de classement Oricon
-        # Oricon utilise une structure spécifique
-        
-        # Méthode 1: Chercher les rows de classement
-        ranking_items = soup.find_all('div', class_='ranking-item')
-        
-        if not ranking_items:
-            # Méthode 2: Chercher les lignes du tableau
-            ranking_items = soup.find_all('tr', class_='js-ranking-item')
-        
-        if not ranking_items:
-            # Méthode 3: Structure générale Oricon
-            ranking_items = soup.select('.ranking-item, .rankingItem, [data-rank]')
-        
-        print(f"   Found {len(ranking_items)} items")
-        
-        for item in ranking_items[:10]:  # Top 10
-            try:
-                # Extraire les données
-                
-                # Titre
-                title_elem = item.find('a', class_='title')
-                if not title_elem:
-                    title_elem = item.find('p', class_='title')
-                if not title_elem:
-                    title_elem = item.find('span', class_='title')
-                
-                if not title_elem:
-                    continue
-                
-                title = title_elem.get_text(strip=True)
-                
-                # Auteur
-                author_elem = item.find('span', class_='artist')
-                if not author_elem:
-                    author_elem = item.find('a', class_='artist')
-                if not author_elem:
-                    author_elem = item.find('p', class_='artist')
-                
-                author = author_elem.get_text(strip=True) if author_elem else "-"
-                
-                # Éditeur
-                publisher_elem = item.find('span', class_='publisher')
-                if not publisher_elem:
-                    publisher_elem = item.find('p', class_='publisher')
-                if not publisher_elem:
-                    publisher_elem = item.find('td', class_='publisher')
-                
-                publisher = publisher_elem.get_text(strip=True) if publisher_elem else "-"
-                
-                # Ventes estimées
-                sales_elem = item.find('span', class_='sales')
-                if not sales_elem:
-                    sales_elem = item.find('p', class_='sales')
-                if not sales_elem:
-                    sales_elem = item.find('td', class_='sales')
-                
-                sales = sales_elem.get_text(strip=True) if sales_elem else "-"
-                
-                # Rang (si pas déjà incrémenté)
-                rank_elem = item.find('span', class_='rank')
-                if rank_elem:
-                    try:
-                        rank = int(rank_elem.get_text(strip=True))
-                    except:
-                        pass
-                
-                print(f"   {rank}. {title}")
-                
-                books.append({
-                    "rank": rank,
-                    "title": title,
-                    "author": author,
-                    "publisher": publisher,
-                    "sales": sales
-                })
-                
-                rank += 1
-                
-            except Exception as e:
-                print(f"   ⚠️  Error parsing item: {e}")
-                continue
-        
-        return books
-        
+        if html:
+            books, method, partial = extract_structured(html)
+            if books:
+                metrics.inc("rows_extracted", len(books), method=method)
+                print(f"   Found {len(books)} items ({method})")
+                for book in books:
+                    print(f"   {book.rank}. {book.title}")
+                return books, method
+            print(f"   ⚠️  No reliable structured ranking ({len(partial)} partial items)")
     except Exception as e:
         print(f"❌ Error scraping {genre}: {e}")
-        return []
+    
+    if ocr:
+        print("   📸 Falling back to screenshot OCR...")
+        books = ocr_fallback(url, genre)
+        if books:
+            metrics.inc("rows_extracted", len(books), method="ocr")
+            return books, "ocr"
+    
+    return partial, "partial" if partial else None
 
-def scrape_all_oricon():
-    """Scrape all Oricon categories"""
+def scrape_oricon(url, genre, ocr=True):
+    """Scrape Oricon ranking page. Returns (books, method)."""
+    
+    print(f"\n🔄 Scraping {genre} from Oricon...")
+    
+    try:
+        with profiling.stage("oricon.fetch"):
+            html = fetch_page(url, genre)
+    except Exception as e:
+        print(f"❌ Error scraping {genre}: {e}")
+        html = None
+    with profiling.stage("oricon.parse"):
+        return extract_books(html, url, genre, ocr)
+
+def new_chart():
+    return Chart("oricon", datetime.now().isoformat() + "Z", {
+        "Comics": [],
+        "Paperback": [],
+        "Light Novel": [],
+        "Light Literature": [],
+        "Literary": []
+    })
+
+def needs_ocr(data):
+    """Genres no structured parser could read reliably"""
+    return [genre for genre, method in data.meta.get("extraction", {}).items() if method in ("partial", None)]
+
+def apply_corrections(data, corrections):
+    """Fill author and publisher from books_corrections.json"""
+    for _, book in data.records():
+        correction = find_correction(book.title, corrections)
+        
+        if correction:
+            book.author = correction.get('author', book.author)
+            book.publisher = correction.get('publisher', book.publisher)
+            print(f"   ✅ Correction applied for: {book.title}")
+    return data
+
+def save_oricon(data):
+    """Record the chart in the ranking history and write oricon_books.json"""
+    # The chart week is the date in the ranking URLs
+    try:
+        week = re.search(r'/w/(\d{4}-\d{2}-\d{2})/', next(iter(ORICON_URLS.values())))
+        chart_day = datetime.strptime(week.group(1), '%Y-%m-%d') if week else None
+        record_history(data, week_period(chart_day))
+    except Exception as e:
+        print(f"⚠️  Could not store ranking history: {e}")
+    
+    # Save to file
+    write_chart(data, 'oricon_books.json')
+    
+    print(f"\n✅ Scraping completed!")
+    for genre, books in data.genres.items():
+        print(f"📚 {genre}: {len(books)} books")
+    print(f"💾 Saved to: oricon_books.json")
+
+@profiling.entry_point
+def scrape_all_oricon(ocr=True):
+    """Scrape all Oricon categories.
+
+    ocr=False skips the OCR fallback: if any genre would have needed it,
+    nothing is saved and those genres are listed in meta["needs_ocr"].
+    """
     
     print("📚 Scraping Oricon Rankings...\n")
     
@@ -162,46 +401,35 @@ def scrape_all_oricon():
     print(f"📋 Loaded corrections: {len(corrections)} genres\n")
     
     # Data structure
-    data = {
-        "updated": datetime.now().isoformat() + "Z",
-        "source": "oricon.co.jp",
-        "genres": {
-            "Comics": [],
-            "Paperback": [],
-            "Light Novel": [],
-            "Light Literature": [],
-            "Literary": []
-        }
-    }
+    data = new_chart()
+    
+    # How each genre was read (json-ld, embedded-json, html, ocr or partial)
+    data.meta["extraction"] = {}
     
     # Scrape each category
     for genre, url in ORICON_URLS.items():
-        books = scrape_oricon(url, genre)
-        
-        # Apply corrections
-        for book in books:
-            correction = find_correction(book['title'], corrections)
-            
-            if correction:
-                book['author'] = correction.get('author', book['author'])
-                book['publisher'] = correction.get('publisher', book['publisher'])
-                print(f"   ✅ Correction applied for: {book['title']}")
-        
-        data["genres"][genre] = books
+        books, method = scrape_oricon(url, genre, ocr)
+        data.meta["extraction"][genre] = method
+        data.genres[genre] = books
         
         time.sleep(2)  # Be respectful
     
-    # Save to file
-    with open('oricon_books.json', 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    missing = needs_ocr(data)
+    if missing and not ocr:
+        data.meta["needs_ocr"] = missing
+        print(f"\n⚠️  Structured extraction failed for: {', '.join(missing)} - not saved, rerun with OCR")
+        return data
     
-    print(f"\n✅ Scraping completed!")
-    print(f"📚 Comics: {len(data['genres']['Comics'])} books")
-    print(f"📚 Paperback: {len(data['genres']['Paperback'])} books")
-    print(f"📚 Light Novel: {len(data['genres']['Light Novel'])} books")
-    print(f"📚 Light Literature: {len(data['genres']['Light Literature'])} books")
-    print(f"📚 Literary: {len(data['genres']['Literary'])} books")
-    print(f"💾 Saved to: oricon_books.json")
+    with profiling.stage("oricon.correct"):
+        apply_corrections(data, corrections)
+        save_oricon(data)
+    
+    return data
 
 if __name__ == "__main__":
-    scrape_all_oricon()
+    # python scrape_oricon.py            - structured data, OCR fallback per genre
+    # python scrape_oricon.py --no-ocr   - structured data only; exit code 3 if OCR is needed
+    # python scrape_oricon.py --profile  - cProfile / tracemalloc reports in reports/profile
+    data = scrape_all_oricon(ocr="--no-ocr" not in sys.argv[1:], profile="--profile" in sys.argv[1:])
+    if data.meta.get("needs_ocr"):
+        sys.exit(3)
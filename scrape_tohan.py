@@ -1,11 +1,15 @@
 #!/usr/bin/env python3
 import os
-import json
-import requests
-import pdfplumber
+import sys
 from datetime import datetime
 import re
 import logging
+import metrics
+import profiling
+from chart_movement import record_history
+from glossary import PUBLISHERS
+from ranking_store import month_period
+from records import BookRecord, Chart, write_chart
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -31,7 +35,7 @@ def download_tohan_pdf(url):
     """Download Tohan PDF"""
     print("📥 Downloading Tohan PDF...")
     try:
-        response = requests.get(url, timeout=30)
+        response = metrics.http_get(url, timeout=30)
         response.raise_for_status()
         
         pdf_path = '/tmp/tohan.pdf'
@@ -47,17 +51,16 @@ def download_tohan_pdf(url):
 
 def parse_tohan_pdf(pdf_path):
     """Parse Tohan PDF and extract rankings from text"""
+    import pdfplumber
+
     print("📖 Parsing Tohan PDF...\n")
     
-    data = {
-        "updated": datetime.now().isoformat() + "Z",
-        "source": "tohan.jp",
-        "genres": {}
-    }
+    data = Chart("tohan", datetime.now().isoformat() + "Z")
     
     try:
         with pdfplumber.open(pdf_path) as pdf:
             print(f"Total pages: {len(pdf.pages)}\n")
+            metrics.inc("pdf_pages", len(pdf.pages))
             
             # Extract all text
             full_text = ""
@@ -90,7 +93,8 @@ def parse_tohan_pdf(pdf_path):
                 books = parse_genre_section(genre_section)
                 
                 if books:
-                    data["genres"][genre] = books
+                    data.genres[genre] = books
+                    metrics.inc("rows_extracted", len(books))
                     print(f"   ✅ {len(books)} books extracted\n")
                 else:
                     print(f"   ⚠️  No books found\n")
@@ -182,24 +186,10 @@ def parse_genre_section(section_text):
         if book:
             books.append(book)
             found_books += 1
-            print(f"      ✓ Rank {rank}: {book['title'][:50]}")
+            print(f"      ✓ Rank {rank}: {book.get('title')[:50]}")
     
     return books
 
-# List of known publishers
-# List of known publishers
-PUBLISHERS = [
-    "SBクリエイティブ", "KADOKAWA", "幸福の科学出版", "オレンジページ", "小学館",
-    "神宮館", "Gakken", "朝日新聞出版", "ワン･パブリッシング", "幻冬舎",
-    "日本経済新聞出版", "高橋書店", "ときわ総合サービス", "サンクチュアリ出版",
-    "1万年堂出版", "PHP研究所", "毎日新聞出版", "日経BP", "ブラウンズブックス",
-    "スイッチ･パブリッシング", "すばる舎", "サンマーク出版", "ワニブックス",
-    "マガジンハウス", "福音館書店", "岩崎書店", "ハーパーコリンズ･ジャパン",
-    "文藝春秋", "新潮社", "双葉社", "飛鳥新社", "講談社", "東京創元社",
-    "宝島社", "ダイヤモンド社", "東洋経済新報社", "朝日新聞出版", "新星出版社",
-    "中央公論新社", "集英社", "光文社", "クラーケンコミックス", "NHK出版", "スイッチ･パブ"
-]
-
 def parse_book_entry(lines, rank):
     """Parse a single book entry from multiple lines"""
     
@@ -273,14 +263,7 @@ def parse_book_entry(lines, rank):
     if not title:
         return None
     
-    return {
-        "rank": rank,
-        "title": title,
-        "author": author if author else "-",
-        "publisher": publisher if publisher else "-",
-        "price": price if price else "-",
-        "isbn": isbn if isbn else "-"
-    }
+    return BookRecord(rank, title, author, publisher, price=price, isbn=isbn)
 
 def correct_overall_from_other_genres(data):
     """Not needed - OVERALL tab removed"""
@@ -326,43 +309,58 @@ def correct_overall_from_other_genres(data):
     data["genres"]["総合"] = corrected_books
     return data
 
-def main():
-    print("📚 Starting Tohan PDF Scraper...\n")
-    
-    pdf_path = download_tohan_pdf(TOHAN_PDF_URL)
-    if not pdf_path:
-        return
-    
-    data = parse_tohan_pdf(pdf_path)
-    if not data:
-        return
-    
-    # Correct OVERALL genre using other genres
-    data = correct_overall_from_other_genres(data)
+def save_data(data):
+    """Record the chart in the ranking history and write data.js; False if data.js was not written"""
+    # Keep a dated copy in the ranking history and pick up rank movements
+    try:
+        record_history(data, month_period(TOHAN_PDF_URL))
+    except Exception as e:
+        logger.error(f"Error storing ranking history: {e}")
     
     # Save data.js
     try:
-        js_content = f"const oricon_data = {json.dumps(data, ensure_ascii=False, indent=2)};\n"
-        
-        with open('data.js', 'w', encoding='utf-8') as f:
-            f.write(js_content)
+        write_chart(data, 'data.js')
         
         print(f"✅ Successfully saved data.js")
-        print(f"📊 Total genres: {len(data['genres'])}")
+        print(f"📊 Total genres: {len(data.genres)}")
         
         total_books = 0
-        for genre, books in data['genres'].items():
+        for genre, books in data.genres.items():
             print(f"   - {genre}: {len(books)} books")
             total_books += len(books)
         
         print(f"\n📈 Total books scraped: {total_books}")
+        return True
     
     except Exception as e:
         logger.error(f"Error saving data.js: {e}")
+        return False
+
+@profiling.entry_point
+def main():
+    print("📚 Starting Tohan PDF Scraper...\n")
+    
+    with profiling.stage("tohan.fetch"):
+        pdf_path = download_tohan_pdf(TOHAN_PDF_URL)
+    if not pdf_path:
+        return
+    
+    with profiling.stage("tohan.parse"):
+        data = parse_tohan_pdf(pdf_path)
+    if not data:
+        return
+    
+    with profiling.stage("tohan.correct"):
+        # Correct OVERALL genre using other genres
+        data = correct_overall_from_other_genres(data)
+        save_data(data)
     
     # Cleanup
     if os.path.exists(pdf_path):
         os.remove(pdf_path)
+    
+    return data
 
 if __name__ == "__main__":
-    main()
+    # python scrape_tohan.py [--profile]
+    main(profile="--profile" in sys.argv[1:])
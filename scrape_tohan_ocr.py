@@ -1,11 +1,11 @@
 #!/usr/bin/env python3
 import os
-import json
 import requests
 import pdfplumber
 from datetime import datetime
 import re
 import logging
+from records import Chart, write_chart
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -215,10 +215,7 @@ def main():
     
     # Generate data.js
     try:
-        js_content = f"const oricon_data = {json.dumps(data, ensure_ascii=False, indent=2)};\n"
-        
-        with open('data.js', 'w', encoding='utf-8') as f:
-            f.write(js_content)
+        write_chart(Chart.from_dict(data, "tohan"), 'data.js')
         
         print(f"\n✅ Successfully saved data.js")
         print(f"📊 Total genres: {len(data['genres'])}")
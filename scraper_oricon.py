@@ -1,19 +1,32 @@
 import requests
-import json
 from bs4 import BeautifulSoup
-import google.generativeai as genai
 import os
 from datetime import datetime
+from chart_movement import record_history
+from ranking_store import week_period
+from records import BookRecord, Chart, write_chart
 
-# Configure Gemini API
-api_key = os.getenv('GEMINI_API_KEY')
-genai.configure(api_key=api_key)
-model = genai.GenerativeModel('gemini-pro')
+# Separate from scrape_oricon.py's "oricon" source: this scraper dates its
+# snapshots by the current week, not the chart week, so the two must not
+# share a history or an output file
+SOURCE = "oricon_web"
+OUTPUT_FILE = 'oricon_web_books.json'
+
+_model = None
+
+def get_model():
+    """Gemini, imported and configured on first use"""
+    global _model
+    if _model is None:
+        import google.generativeai as genai
+        genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
+        _model = genai.GenerativeModel('gemini-pro')
+    return _model
 
 def translate_japanese_to_english(text):
     """Translate Japanese text to English using Gemini"""
     try:
-        response = model.generate_content(f"Translate this Japanese text to English. Only provide the translation, nothing else:\n\n{text}")
+        response = get_model().generate_content(f"Translate this Japanese text to English. Only provide the translation, nothing else:\n\n{text}")
         return response.text.strip()
     except Exception as e:
         print(f"Translation error: {e}")
@@ -51,15 +64,13 @@ def scrape_oricon_rankings(genre_url):
                     title_en = translate_japanese_to_english(title)
                     author_en = translate_japanese_to_english(author)
                     
-                    rankings.append({
-                        "rank": str(idx),
-                        "title": title_en,
-                        "title_jp": title,
-                        "author": author_en,
-                        "author_jp": author,
-                        "sales": int(''.join(filter(str.isdigit, sales)) or '0'),
-                        "image": image
-                    })
+                    rankings.append(BookRecord(
+                        idx, title, author,
+                        sales=sales or 0,
+                        image=image,
+                        title_en=title_en,
+                        author_en=author_en
+                    ))
             except Exception as e:
                 print(f"Error parsing item {idx}: {e}")
                 continue
@@ -80,26 +91,28 @@ def main():
         "Comics": "https://www.oricon.co.jp/rank/book/d/3/"
     }
     
-    data = {
-        "updated": datetime.now().isoformat() + "Z",
+    data = Chart(SOURCE, datetime.now().isoformat() + "Z", meta={
         "week": f"Week {datetime.now().isocalendar()[1]} {datetime.now().year}",
-        "genres": {},
         "total_genres": len(genres)
-    }
+    })
     
     print("Starting Oricon scraper with Gemini translation...")
     
     for genre_name, genre_url in genres.items():
         print(f"Scraping {genre_name}...")
         rankings = scrape_oricon_rankings(genre_url)
-        data["genres"][genre_name] = rankings
+        data.genres[genre_name] = rankings
         print(f"  Found {len(rankings)} books")
     
-    # Save to JSON
-    with open('oricon_books.json', 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    try:
+        record_history(data, week_period())
+    except Exception as e:
+        print(f"Could not store ranking history: {e}")
+    
+    # Save to JSON (title/author stay Japanese, translations go in title_en/author_en)
+    write_chart(data, OUTPUT_FILE)
     
-    print("Scraping complete! Data saved to oricon_books.json")
+    print(f"Scraping complete! Data saved to {OUTPUT_FILE}")
 
 if __name__ == "__main__":
     main()
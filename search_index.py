@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+import sys
+import time
+import unicodedata
+
+# Columns of each published doc
+DOC_FIELDS = ("source", "genre", "rank", "title", "author", "publisher", "isbn")
+
+# Book fields indexed for search (isbn is matched on its digits)
+INDEXED_FIELDS = ("title", "author", "publisher", "isbn")
+
+def normalize(text):
+    """Search key: NFKC, lowercase, without whitespace or hyphens.
+
+    index.html normalizes queries the same way (see normalizeSearch).
+    """
+    text = unicodedata.normalize('NFKC', text or '').lower()
+    return ''.join(ch for ch in text if not ch.isspace() and ch != '-')
+
+def grams(text):
+    """Every bigram of a normalized string"""
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+def doc_key(doc):
+    """Normalized searchable text of a published doc (mirrors docKey in index.html).
+
+    Fields are joined with a separator so no match spans two of them.
+    """
+    return '\x1f'.join(normalize(doc[DOC_FIELDS.index(field)]) for field in INDEXED_FIELDS)
+
+def build_index(charts):
+    """Build the published index from source -> records.Chart.
+
+    {"fields": [...], "docs": [[source, genre, rank, title, author, publisher, isbn], ...],
+     "postings": {bigram: delta-encoded sorted doc ids}}
+
+    Only bigrams are posted: single-character queries scan the docs, and
+    matches are confirmed on doc_key(), which clients derive from the docs.
+    """
+    docs, postings = [], {}
+    for source, chart in charts.items():
+        for genre, book in chart.records():
+            if not book.title:
+                continue
+            doc_id = len(docs)
+            docs.append([source, genre, book.rank, book.title, book.author, book.publisher, book.isbn])
+            for gram in set().union(*(grams(normalize(getattr(book, field))) for field in INDEXED_FIELDS)):
+                postings.setdefault(gram, []).append(doc_id)
+
+    # Ids are appended in order, so each list is already sorted. Grams are
+    # emitted sorted: set order varies with PYTHONHASHSEED, and the published
+    # file is content-hashed
+    encoded = {}
+    for gram in sorted(postings):
+        ids = postings[gram]
+        previous = 0
+        deltas = []
+        for doc_id in ids:
+            deltas.append(doc_id - previous)
+            previous = doc_id
+        encoded[gram] = deltas
+
+    return {"fields": list(DOC_FIELDS), "docs": docs, "postings": encoded}
+
+def decode(deltas):
+    ids, total = [], 0
+    for delta in deltas:
+        total += delta
+        ids.append(total)
+    return ids
+
+def search(index, query, limit=20):
+    """Docs matching query, best chart position first (mirrors searchBooks in index.html)"""
+    query = normalize(query)
+    if not query:
+        return []
+    # A single character has no bigram: scan every doc
+    candidates = set(range(len(index["docs"])))
+    for gram in sorted(grams(query), key=lambda g: len(index["postings"].get(g, []))):
+        candidates &= set(decode(index["postings"].get(gram, [])))
+        if not candidates:
+            return []
+    # Bigrams can co-occur without the query being a substring: confirm on the key
+    hits = [doc_id for doc_id in candidates if query in doc_key(index["docs"][doc_id])]
+    hits.sort(key=lambda doc_id: (index["docs"][doc_id][2] or 999, doc_id))
+    return [dict(zip(index["fields"], index["docs"][doc_id])) for doc_id in hits[:limit]]
+
+if __name__ == "__main__":
+    # python search_index.py 成瀬
+    from publish import load_charts
+
+    index = build_index(load_charts())
+    print(f"{len(index['docs'])} docs, {len(index['postings'])} grams")
+    for query in sys.argv[1:]:
+        start = time.perf_counter()
+        results = search(index, query)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"\n'{query}': {len(results)} results in {elapsed:.2f} ms")
+        for doc in results:
+            print(f"  {doc['source']:<7} {doc['genre']:<20} #{doc['rank']:<3} {doc['title']}")
@@ -0,0 +1,45 @@
+from ocr_engines import OCRLine, OCRResult
+from ocr_table import parse_boxes, split_cells
+from scrape_from_image import parse_ocr_result, parse_ranking_table
+
+# Tesseract output: one box per table row, cells joined by two spaces
+TESSERACT_ROWS = [
+    ("1  変な地図  雨穴／著  双葉社", 20),
+    ("2  成瀬は天下を取りにいく  宮島未奈／著  新潮社", 60),
+    ("3  ハンチバック  市川沙央／著  文藝春秋", 100),
+]
+
+EXPECTED = [
+    {"rank": 1, "title": "変な地図", "author": "雨穴／著", "publisher": "双葉社"},
+    {"rank": 2, "title": "成瀬は天下を取りにいく", "author": "宮島未奈／著", "publisher": "新潮社"},
+    {"rank": 3, "title": "ハンチバック", "author": "市川沙央／著", "publisher": "文藝春秋"},
+]
+
+def tesseract_lines():
+    return [OCRLine(text, 0.9, (10, y, 10 + len(text) * 24, y + 20)) for text, y in TESSERACT_ROWS]
+
+def test_split_cells_breaks_full_rows_into_cells():
+    cells = split_cells(tesseract_lines()[:1])
+    assert [cell.text for cell in cells] == ["1", "変な地図", "雨穴／著", "双葉社"]
+    assert [cell.box[0] for cell in cells] == sorted(cell.box[0] for cell in cells)
+
+def test_parse_boxes_full_rows():
+    assert parse_boxes(tesseract_lines()) == EXPECTED
+
+def test_parse_boxes_agrees_with_text_parser():
+    text = '\n'.join(text for text, _ in TESSERACT_ROWS)
+    assert parse_boxes(tesseract_lines()) == parse_ranking_table(text)
+
+def test_parse_ocr_result_tesseract():
+    lines = tesseract_lines()
+    result = OCRResult("tesseract", lines, '\n'.join(line.text for line in lines))
+    assert parse_ocr_result(result) == EXPECTED
+
+def test_parse_boxes_one_box_per_cell():
+    lines = []
+    for rank, (y, cells) in enumerate([(20, ("変な地図", "雨穴", "双葉社")), (60, ("ハンチバック", "市川沙央", "文藝春秋"))], 1):
+        lines.append(OCRLine(str(rank), 0.9, (10, y, 30, y + 20)))
+        for x, text in zip((60, 400, 600), cells):
+            lines.append(OCRLine(text, 0.9, (x, y, x + 24 * len(text), y + 20)))
+    assert [(book["title"], book["author"], book["publisher"]) for book in parse_boxes(lines)] == [
+        ("変な地図", "雨穴", "双葉社"), ("ハンチバック", "市川沙央", "文藝春秋")]
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+import profiling
+
+logger = logging.getLogger(__name__)
+
+# Worker threads used for translation calls
+MAX_WORKERS = 8
+
+# Delay between two request starts (seconds)
+START_INTERVAL = 0.5
+MIN_INTERVAL = 0.05
+MAX_INTERVAL = 30.0
+
+# Retries for a single text after a 429 / quota error
+MAX_RETRIES = 5
+
+def is_rate_limited(error):
+    """Return True if an API error means we hit the rate limit (HTTP 429)"""
+    if type(error).__name__ in ('ResourceExhausted', 'TooManyRequests'):
+        return True
+    message = str(error)
+    return '429' in message or 'quota' in message.lower() or 'rate limit' in message.lower()
+
+class AdaptiveRateLimiter:
+    """Spaces out request starts, speeding up on success and backing off on 429"""
+
+    def __init__(self, interval=START_INTERVAL, min_interval=MIN_INTERVAL, max_interval=MAX_INTERVAL):
+        self.interval = interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self._next_start = 0.0
+        self._backed_off_at = float('-inf')
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until the next request slot is free; returns the slot's start time"""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.interval
+        delay = start - now
+        if delay > 0:
+            time.sleep(delay)
+        return start
+
+    def on_success(self):
+        """Speed up gently: shave 10% off the interval"""
+        with self._lock:
+            self.interval = max(self.min_interval, self.interval * 0.9)
+
+    def on_rate_limited(self, started=None):
+        """Multiplicative back-off: double the interval and pause new starts.
+
+        started is the acquire() time of the request that got the 429. Requests
+        already in flight at the last back-off hit the same window, so their
+        429s do not double the interval again.
+        """
+        with self._lock:
+            if started is not None and started < self._backed_off_at:
+                return
+            now = time.monotonic()
+            self._backed_off_at = now
+            self.interval = min(self.max_interval, self.interval * 2)
+            self._next_start = max(self._next_start, now + self.interval)
+        logger.warning(f"Rate limited - slowing down to one request every {self.interval:.2f}s")
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[idx]
+
+def translate_concurrently(translate_fn, items, max_workers=MAX_WORKERS, limiter=None, label="translations",
+                           lookup=None):
+    """Run translate_fn(*item) for each item on a thread pool.
+
+    Each item is an argument tuple whose first element is the source text.
+    translate_fn must raise on rate-limit errors (see is_rate_limited) and
+    handle any other error itself. lookup(*item), if given, returns a cached
+    result (or None) and is checked before waiting on the rate limiter.
+    Results are returned in the same order as items, so callers get exactly
+    what the serial loop produced.
+    """
+    items = list(items)
+    if not items:
+        return []
+
+    limiter = limiter or AdaptiveRateLimiter()
+    latencies = []
+    latencies_lock = threading.Lock()
+
+    def run(item):
+        if lookup is not None:
+            cached = lookup(*item)
+            if cached is not None:
+                return cached
+        for attempt in range(MAX_RETRIES + 1):
+            slot = limiter.acquire()
+            started = time.perf_counter()
+            try:
+                result = translate_fn(*item)
+            except Exception as e:
+                if is_rate_limited(e) and attempt < MAX_RETRIES:
+                    metrics.inc("translation_retries")
+                    limiter.on_rate_limited(slot)
+                    continue
+                logger.warning(f"Giving up on {item!r}: {e}")
+                # Same fallback as the serial path: keep the original text
+                return item[0]
+            elapsed = time.perf_counter() - started
+            metrics.observe("translation_latency_seconds", elapsed)
+            with latencies_lock:
+                latencies.append(elapsed)
+            limiter.on_success()
+            return result
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        results = list(pool.map(metrics.bind(profiling.bind(run)), items))
+    wall = time.perf_counter() - wall_start
+
+    logger.info(
+        f"📊 {len(items)} {label} in {wall:.1f}s "
+        f"({len(items) / wall if wall else 0:.1f}/s) - "
+        f"latency p50={percentile(latencies, 50) * 1000:.0f}ms "
+        f"p95={percentile(latencies, 95) * 1000:.0f}ms "
+        f"p99={percentile(latencies, 99) * 1000:.0f}ms, "
+        f"final interval {limiter.interval:.2f}s"
+    )
+    return results
+
+def translate_unique(translate_fn, items, max_workers=MAX_WORKERS, limiter=None, label="translations", glossary=None,
+                     lookup=None):
+    """Translate each distinct item once and fill the results back in.
+
+    Items are argument tuples like (text, field); identical tuples across
+    the whole dataset share one model call. Empty and '-' texts are passed
+    through untouched. When a glossary is given, known entities are resolved
+    locally first and new model translations are offered back to it.
+    lookup is passed to translate_concurrently. Returns results aligned
+    with items.
+    """
+    items = list(items)
+    translatable = [item for item in items if item[0] and item[0] != '-']
+    unique = list(dict.fromkeys(translatable))
+
+    translated = {}
+    if glossary is not None:
+        for item in unique:
+            known = glossary.lookup(*item[:2])
+            if known is not None:
+                translated[item] = known
+    to_translate = [item for item in unique if item not in translated]
+    if glossary is not None:
+        metrics.inc("cache_hits", len(translated), cache="glossary")
+        metrics.inc("cache_misses", len(to_translate), cache="glossary")
+
+    results = translate_concurrently(
+        translate_fn, to_translate, max_workers=max_workers, limiter=limiter, label=label, lookup=lookup
+    )
+    for item, result in zip(to_translate, results):
+        translated[item] = result
+        if glossary is not None:
+            glossary.learn(item[0], item[1], result)
+
+    logger.info(
+        f"♻️  {len(translatable)} strings, {len(unique)} unique, "
+        f"{len(unique) - len(to_translate)} from glossary - "
+        f"{len(translatable) - len(to_translate)} model calls saved"
+    )
+    return [translated.get(item, item[0]) for item in items]
@@ -1,98 +1,207 @@
-import json
-import google.generativeai as genai
 import os
 import logging
-import time
+import sys
+import threading
+import metrics
+import profiling
+from glossary import GLOSSARY_FIELDS, Glossary
+from records import load_chart
+from translate_executor import is_rate_limited, translate_unique
+from translation_sidecars import TRANSLATED_FIELDS, load_sidecar, record_id, save_sidecar, source_hash, stale_records
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Configure Gemini
-genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
-model = genai.GenerativeModel('gemini-pro')
+# Gemini is imported and configured on the first call that needs it;
+# runs where every translation is already in the sidecars never load it
+_model = None
+_model_lock = threading.Lock()
+
+def get_model():
+    global _model
+    with _model_lock:
+        if _model is None:
+            import google.generativeai as genai
+            genai.configure(api_key=os.getenv('GEMINI_API_KEY'))
+            _model = genai.GenerativeModel('gemini-pro')
+    return _model
 
 TRANSLATIONS_CACHE = {}
+# Guards TRANSLATIONS_CACHE and _in_flight: translations run on a thread pool
+_cache_lock = threading.Lock()
+# cache key -> Event set once the thread translating it has finished
+_in_flight = {}
+
+LANGUAGE_NAMES = {
+    "en": "English",
+    "fr": "French"
+}
 
-def translate_with_gemini(text, field_type="text"):
-    """Translate Japanese text to English using Gemini"""
+def cached_translation(text, field_type="text", lang="en"):
+    """The cached translation of text, or None"""
+    with _cache_lock:
+        translation = TRANSLATIONS_CACHE.get(f"{lang}:{field_type}:{text}")
+    if translation is not None:
+        metrics.inc("cache_hits", cache="translations")
+    return translation
+
+def translate_with_gemini(text, field_type="text", lang="en"):
+    """Translate Japanese text to the target language using Gemini"""
     if not text or text == "-":
         return text
     
+    language = LANGUAGE_NAMES[lang]
+    cache_key = f"{lang}:{field_type}:{text}"
+    
+    # Check cache first; a text another thread is translating waits for that call
+    with _cache_lock:
+        translation = TRANSLATIONS_CACHE.get(cache_key)
+        pending = _in_flight.get(cache_key) if translation is None else None
+        if translation is None and pending is None:
+            _in_flight[cache_key] = threading.Event()
+    if translation is not None:
+        metrics.inc("cache_hits", cache="translations")
+        return translation
+    if pending is not None:
+        pending.wait()
+        # Cached now, unless that call failed (then this one tries again)
+        return translate_with_gemini(text, field_type, lang)
+    metrics.inc("cache_misses", cache="translations")
+    
     try:
-        # Check cache first
-        cache_key = f"{field_type}:{text}"
-        if cache_key in TRANSLATIONS_CACHE:
-            return TRANSLATIONS_CACHE[cache_key]
-        
         # Different prompts for different field types
         if field_type == "title":
-            prompt = f"Translate this Japanese book title to English. Use romanization where needed (e.g., 変な地図 = Hen na Chizu). Return ONLY the translation:\n{text}"
+            prompt = f"Translate this Japanese book title to {language}. Use romanization where needed (e.g., 変な地図 = Hen na Chizu). Return ONLY the translation:\n{text}"
         elif field_type == "author":
-            prompt = f"Translate this Japanese author name to English. Keep the original name order. Return ONLY the translation:\n{text}"
+            prompt = f"Translate this Japanese author name to {language}. Keep the original name order. Return ONLY the translation:\n{text}"
         elif field_type == "publisher":
-            prompt = f"Translate this Japanese publisher name to English. Return ONLY the translation:\n{text}"
+            prompt = f"Translate this Japanese publisher name to {language}. Return ONLY the translation:\n{text}"
         elif field_type == "genre":
-            prompt = f"Translate this Japanese genre name to English. Return ONLY the translation:\n{text}"
+            prompt = f"Translate this Japanese genre name to {language}. Return ONLY the translation:\n{text}"
         else:
-            prompt = f"Translate this Japanese text to English. Return ONLY the translation:\n{text}"
+            prompt = f"Translate this Japanese text to {language}. Return ONLY the translation:\n{text}"
         
-        response = model.generate_content(prompt)
+        metrics.inc("translation_calls", lang=lang)
+        response = get_model().generate_content(prompt)
         translation = response.text.strip()
         
         # Cache the translation
-        TRANSLATIONS_CACHE[cache_key] = translation
-        logger.info(f"✓ [{field_type}] {text} → {translation}")
-        
-        # Rate limiting to avoid API errors
-        time.sleep(0.5)
+        with _cache_lock:
+            TRANSLATIONS_CACHE[cache_key] = translation
+        logger.info(f"✓ [{lang}/{field_type}] {text} → {translation}")
         
         return translation
     except Exception as e:
+        if is_rate_limited(e):
+            raise  # let the executor back off and retry
         logger.error(f"Error translating '{text}' ({field_type}): {e}")
         return text
+    finally:
+        with _cache_lock:
+            _in_flight.pop(cache_key).set()
 
-def translate_data():
-    """Translate all data in data.js"""
+def apply_glossary(data, sidecar, glossary):
+    """Replace sidecar translations the glossary now knows (terms approved after
+    the record was translated); returns the number of fields changed"""
+    changed = 0
+    for genre in data.genres:
+        known = glossary.lookup(genre, "genre")
+        if known and sidecar["genres"].get(genre) != known:
+            sidecar["genres"][genre] = known
+            changed += 1
+    fields = [field for field in TRANSLATED_FIELDS if field in GLOSSARY_FIELDS]
+    for _, book in data.records():
+        entry = sidecar["records"].get(record_id(book))
+        if not entry:
+            continue
+        for field in fields:
+            known = glossary.lookup(book.get(field), field)
+            if known and entry.get(field) != known:
+                entry[field] = known
+                changed += 1
+    return changed
+
+def untranslated(text, result):
+    """True when a Japanese text came back unchanged: translate_with_gemini and
+    the executor return the source text when a call fails"""
+    return bool(text) and text != '-' and result == text and not text.isascii()
+
+@profiling.entry_point
+def translate_data(lang="en", source="tohan", chart=None):
+    """Translate a chart into the translations/<source>.<lang>.json sidecar.
+
+    Pass the scraper's records.Chart to skip re-reading data.js. data.js
+    keeps the Japanese originals; only records whose source text changed
+    since the last run are sent for translation.
+    """
     try:
-        # Read data.js
-        with open('data.js', 'r', encoding='utf-8') as f:
-            content = f.read()
+        data = chart if chart is not None else load_chart('data.js', source)
+        
+        sidecar = load_sidecar(source, lang)
+        genres = [genre for genre in data.genres if genre not in sidecar["genres"]]
+        stale = stale_records(data, sidecar)
+        
+        total = len({record_id(book) for _, book in data.records()})
+        logger.info(f"🗂️  {lang}: {len(stale)}/{total} records and {len(genres)} genres need translating")
+        
+        # Collect every (text, field) pair, then translate each distinct pair once
+        jobs = [(genre, "genre") for genre in genres]
+        for book in stale.values():
+            for field in TRANSLATED_FIELDS:
+                jobs.append((book.get(field), field))
+        
+        # The glossary only holds English forms
+        glossary = Glossary() if lang == "en" else None
+        with profiling.stage(f"translate.{lang}"):
+            results = iter(translate_unique(
+                lambda text, field: translate_with_gemini(text, field, lang),
+                jobs,
+                label=f"{lang} translations",
+                glossary=glossary,
+                lookup=lambda text, field: cached_translation(text, field, lang)
+            ))
+        if glossary is not None:
+            glossary.save()
+        
+        # Failed translations are not recorded as done, so the next run retries them
+        failed = 0
+        for genre in genres:
+            translation = next(results)
+            if untranslated(genre, translation):
+                failed += 1
+            else:
+                sidecar["genres"][genre] = translation
         
-        # Extract JSON from data.js (remove 'const oricon_data = ' and ';')
-        json_str = content.replace('const oricon_data = ', '').rstrip(';')
-        data = json.loads(json_str)
+        for rid, book in stale.items():
+            entry = {}
+            for field in TRANSLATED_FIELDS:
+                entry[field] = next(results)
+            if any(untranslated(book.get(field), entry[field]) for field in TRANSLATED_FIELDS):
+                failed += 1
+            else:
+                entry["hash"] = source_hash(book)
+            sidecar["records"][rid] = entry
+            logger.info(f"  Translated book: {book.get('title')[:30]}...")
+        if failed:
+            logger.warning(f"⚠️  {failed} genres/records came back untranslated - retried next run")
         
-        # Translate all genres and books
-        translated_data = {
-            "updated": data.get("updated"),
-            "genres": {}
-        }
+        # Books no longer on the chart
+        current = {record_id(book) for _, book in data.records()}
+        dropped = [rid for rid in sidecar["records"] if rid not in current]
+        for rid in dropped:
+            del sidecar["records"][rid]
+        if dropped:
+            logger.info(f"🧹 Dropped {len(dropped)} records no longer on the chart")
         
-        for genre, books in data.get("genres", {}).items():
-            # Translate genre name
-            translated_genre = translate_with_gemini(genre, "genre")
-            
-            # Translate each book's data
-            translated_books = []
-            for book in books:
-                translated_book = {
-                    "rank": book.get("rank"),
-                    "title": translate_with_gemini(book.get("title"), "title"),
-                    "author": translate_with_gemini(book.get("author"), "author"),
-                    "publisher": translate_with_gemini(book.get("publisher"), "publisher"),
-                    "price": book.get("price"),  # Keep price as-is
-                    "isbn": book.get("isbn")      # Keep ISBN as-is
-                }
-                translated_books.append(translated_book)
-                logger.info(f"  Translated book: {book.get('title')[:30]}...")
-            
-            translated_data["genres"][translated_genre] = translated_books
+        if glossary is not None:
+            changed = apply_glossary(data, sidecar, glossary)
+            if changed:
+                logger.info(f"📘 {changed} earlier translations replaced by glossary entries")
         
-        # Write back to data.js
-        with open('data.js', 'w', encoding='utf-8') as f:
-            f.write(f"const oricon_data = {json.dumps(translated_data, ensure_ascii=False, indent=2)};")
+        sidecar["updated"] = data.updated
+        save_sidecar(source, lang, sidecar)
         
-        logger.info("✅ All translations complete!")
+        logger.info(f"✅ All translations complete! ({lang})")
         return True
         
     except Exception as e:
@@ -100,4 +209,9 @@ def translate_data():
         return False
 
 if __name__ == "__main__":
-    translate_data()
+    # python translate_tables.py [en fr ...] [--profile]
+    if "--profile" in sys.argv[1:]:
+        profiling.enable()
+    for lang in [arg for arg in sys.argv[1:] if not arg.startswith('--')] or ["en"]:
+        translate_data(lang)
+    profiling.finish()
@@ -1,9 +1,9 @@
 #!/usr/bin/env python3
-import json
 import logging
 import os
-import time
-import google.generativeai as genai
+from glossary import Glossary
+from records import load_chart, write_chart
+from translate_executor import is_rate_limited, translate_unique
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -16,6 +16,7 @@ def setup_gemini():
         logger.error("GEMINI_API_KEY environment variable not set!")
         return None
     
+    import google.generativeai as genai
     genai.configure(api_key=api_key)
     return genai.GenerativeModel('gemini-1.5-flash')
 
@@ -35,6 +36,8 @@ def translate_text(model, text):
             return text
     
     except Exception as e:
+        if is_rate_limited(e):
+            raise  # let the executor back off and retry
         logger.warning(f"Translation error for '{text}': {e}")
         return text
 
@@ -42,30 +45,32 @@ def translate_books_data(data, model):
     """Translate book titles, authors, and publishers to English"""
     print("\n🌐 Translating data to English with Gemini...\n")
     
-    for genre, books in data['genres'].items():
-        print(f"📖 Translating {genre}... ({len(books)} books)")
+    fields = ('title', 'author', 'publisher')
+    
+    # Pre-pass over every genre: the same title/author/publisher is only
+    # sent to the model once, however many genres it appears in
+    jobs = []
+    for genre, book in data.records():
+        for field in fields:
+            jobs.append((book, field))
+    
+    glossary = Glossary()
+    results = translate_unique(
+        lambda text, field: translate_text(model, text),
+        [(getattr(book, field), field) for book, field in jobs],
+        label="Tohan translations",
+        glossary=glossary
+    )
+    glossary.save()
+    
+    for (book, field), translated in zip(jobs, results):
+        setattr(book, f'{field}_en', translated)
+    
+    for genre, books in data.genres.items():
+        print(f"📖 {genre}... ({len(books)} books)")
         
         for idx, book in enumerate(books):
-            # Translate title
-            if book['title'] and book['title'] != '-':
-                book['title_en'] = translate_text(model, book['title'])
-                print(f"   [{idx+1}] {book['title']} → {book['title_en']}")
-            else:
-                book['title_en'] = book['title']
-            
-            # Translate author
-            if book['author'] and book['author'] != '-':
-                book['author_en'] = translate_text(model, book['author'])
-            else:
-                book['author_en'] = book['author']
-            
-            # Translate publisher
-            if book['publisher'] and book['publisher'] != '-':
-                book['publisher_en'] = translate_text(model, book['publisher'])
-            else:
-                book['publisher_en'] = book['publisher']
-            
-            time.sleep(0.5)  # Rate limiting
+            print(f"   [{idx+1}] {book.title} → {book.title_en}")
         
         print(f"   ✅ {len(books)} books translated\n")
     
@@ -82,11 +87,7 @@ def main():
     
     # Read data.js
     try:
-        with open('data.js', 'r', encoding='utf-8') as f:
-            content = f.read()
-            # Extract JSON from "const oricon_data = {...};"
-            json_str = content.replace('const oricon_data = ', '').rstrip(';')
-            data = json.loads(json_str)
+        data = load_chart('data.js', 'tohan')
         print("✅ data.js loaded")
     except Exception as e:
         logger.error(f"Error reading data.js: {e}")
@@ -97,16 +98,13 @@ def main():
     
     # Save translated data.js
     try:
-        js_content = f"const oricon_data = {json.dumps(data, ensure_ascii=False, indent=2)};\n"
-        
-        with open('data.js', 'w', encoding='utf-8') as f:
-            f.write(js_content)
+        write_chart(data, 'data.js')
         
         print(f"\n✅ Successfully saved translated data.js")
-        print(f"📊 Total genres: {len(data['genres'])}")
+        print(f"📊 Total genres: {len(data.genres)}")
         
         total_books = 0
-        for genre, books in data['genres'].items():
+        for genre, books in data.genres.items():
             print(f"   - {genre}: {len(books)} books")
             total_books += len(books)
         
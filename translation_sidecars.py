@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+import hashlib
+import json
+import logging
+import os
+import unicodedata
+
+logger = logging.getLogger(__name__)
+
+SIDECAR_DIR = 'translations'
+
+# Book fields that get translated
+TRANSLATED_FIELDS = ("title", "author", "publisher")
+
+def record_id(book):
+    """Stable ID for a book: its ISBN digits, or its normalized title.
+
+    index.html computes the same ID (see recordId) to overlay sidecars.
+    """
+    isbn = ''.join(ch for ch in (book.get("isbn") or '') if ch.isdigit())
+    if isbn:
+        return f"isbn:{isbn}"
+    title = ' '.join(unicodedata.normalize('NFKC', book.get("title") or '').split())
+    return f"title:{title}"
+
+def source_hash(book):
+    """Short hash of the Japanese text a translation was made from"""
+    text = '\x1f'.join(str(book.get(field) or '') for field in TRANSLATED_FIELDS)
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:12]
+
+def sidecar_path(source, lang):
+    return os.path.join(SIDECAR_DIR, f"{source}.{lang}.json")
+
+def load_sidecar(source, lang):
+    """Load translations/<source>.<lang>.json, or an empty sidecar"""
+    path = sidecar_path(source, lang)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            sidecar = json.load(f)
+    except FileNotFoundError:
+        sidecar = {}
+    except Exception as e:
+        logger.warning(f"Could not load {path}: {e}")
+        sidecar = {}
+    sidecar.setdefault("lang", lang)
+    sidecar.setdefault("genres", {})
+    sidecar.setdefault("records", {})
+    return sidecar
+
+def save_sidecar(source, lang, sidecar):
+    os.makedirs(SIDECAR_DIR, exist_ok=True)
+    with open(sidecar_path(source, lang), 'w', encoding='utf-8') as f:
+        json.dump(sidecar, f, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+
+def stale_records(chart, sidecar):
+    """Books of a records.Chart whose source text changed since the sidecar was written.
+
+    A book listed in several genres is judged by its first occurrence only.
+    """
+    seen = set()
+    stale = {}
+    for _, book in chart.records():
+        rid = record_id(book)
+        if rid in seen:
+            continue
+        seen.add(rid)
+        entry = sidecar["records"].get(rid)
+        if not entry or entry.get("hash") != source_hash(book):
+            stale[rid] = book
+    return stale